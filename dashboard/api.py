@@ -0,0 +1,116 @@
+import hashlib
+import json
+import math
+
+import pyarrow as pa
+from flask import Response, jsonify, request
+
+import metrics
+
+
+# endpoint data untuk tim lain, tanpa lewat callback dash / membangun figure:
+#
+#   GET /api/v1/<tabel>?mpa_control=MPA&year=2020&trophic=all&family=all&format=json|arrow
+#
+# tabel: kpis, trophic, temporal, sites, summary (agregat yang sama dengan panel dashboard).
+# parameter filter sama dengan empat dropdown, yang tidak diisi = "all".
+# format arrow (atau header Accept: application/vnd.apache.arrow.stream) -> Arrow IPC stream.
+# response disimpan per (tabel, filter, format, versi data) dan diberi ETag dari isi body,
+# jadi request ulang dengan If-None-Match dijawab 304 tanpa menghitung/serialisasi ulang
+
+API_TABLES      = ("kpis", "trophic", "temporal", "sites", "summary")
+ARROW_MIMETYPE  = "application/vnd.apache.arrow.stream"
+
+# nama parameter query -> (kolom filter, tipe nilai)
+FILTER_PARAMS   = {
+    "mpa_control"   : ("control/mpa", str),
+    "year"          : ("year", int),
+    "trophic"       : ("trophic", str),
+    "family"        : ("family", str),
+}
+
+
+# query string -> tuple filter (urutan argumen aggregates_for); ValueError kalau tidak valid
+def parse_filters(args):
+    unknown = set(args) - set(FILTER_PARAMS) - {"format"}
+    if unknown:
+        raise ValueError(f"parameter tidak dikenal: {', '.join(sorted(unknown))}")
+
+    filters = []
+    for name, (_, kind) in FILTER_PARAMS.items():
+        value = args.get(name, "all").strip() or "all"
+        if value != "all":
+            try:
+                value = kind(value)
+            except ValueError:
+                raise ValueError(f"nilai {name} tidak valid: {value!r}") from None
+        filters.append(value)
+    return tuple(filters)
+
+
+def _format(args):
+    fmt = args.get("format")
+    if fmt is None:
+        fmt = "arrow" if ARROW_MIMETYPE in request.headers.get("Accept", "") else "json"
+    if fmt not in ("json", "arrow"):
+        raise ValueError(f"format tidak dikenal: {fmt!r} (json atau arrow)")
+    return fmt
+
+
+def _kpis(kpis):
+    return {name: (None if isinstance(value, float) and math.isnan(value) else value.item() if hasattr(value, "item") else value)
+            for name, value in kpis.items()}
+
+
+# hasil lookup cube -> (body bytes, mimetype)
+def serialize(result, table, fmt):
+    value = result[table]
+    if fmt == "arrow":
+        if table == "kpis":
+            arrow = pa.Table.from_pylist([_kpis(value)])
+        else:
+            arrow = pa.Table.from_pandas(value, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, arrow.schema) as writer:
+            writer.write_table(arrow)
+        return sink.getvalue().to_pybytes(), ARROW_MIMETYPE
+
+    if table == "kpis":
+        return json.dumps(_kpis(value)).encode("utf-8"), "application/json"
+    return value.to_json(orient="records", date_format="iso").encode("utf-8"), "application/json"
+
+
+# lookup(*filters) -> dict agregat (aggregates_for di app.py), version() -> versi data saat ini,
+# cache = FigureCache yang dipakai khusus untuk response api
+def install(server, lookup, version, cache, prefix="/api/v1"):
+    @server.route(f"{prefix}/<table>")
+    def _query(table):
+        if table not in API_TABLES:
+            return jsonify(error=f"tabel tidak dikenal: {table}", tables=list(API_TABLES)), 404
+        try:
+            filters = parse_filters(request.args)
+            fmt     = _format(request.args)
+        except ValueError as exc:
+            return jsonify(error=str(exc)), 400
+
+        key     = (table, fmt) + filters
+        current = version()
+        with metrics.timed("api_cache"):
+            entry = cache.get_payload(key, current)
+        if entry is None:
+            with metrics.timed("api_query"):
+                result = lookup(*filters)
+            with metrics.timed("api_serialize"):
+                body, mimetype = serialize(result, table, fmt)
+            entry = (body, mimetype, hashlib.sha256(body).hexdigest()[:32])
+            cache.put_payload(key, current, entry, len(body))
+
+        body, mimetype, etag = entry
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"]   = "no-cache"
+        response.headers["Vary"]            = "Accept"
+        return response
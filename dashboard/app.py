@@ -1,25 +1,179 @@
 import dash
-from dash import dcc, html, Input, Output, callback, dash_table
+from dash import dcc, html, Input, Output, State, Patch, callback, dash_table, ctx
+from dash.exceptions import PreventUpdate
 
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import dash_bootstrap_components as dbc
 import numpy as np
+import os
+import threading
+import functools
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# response callback diserialisasi dengan orjson (jauh lebih cepat dari json standar) dan
+# dikompres gzip oleh flask-compress; keduanya ada di requirements.txt
+if importlib.util.find_spec("orjson") is not None:
+    pio.json.config.default_engine = "orjson"
 
 
 # Initialize the Dash app with Bootstrap theme
-app                 = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
+app                 = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY],
+                                compress=importlib.util.find_spec("flask_compress") is not None)
 app.title           = "MPA data explorer"
 
+# WSGI entry point (gunicorn app:server, lihat serve.py)
+server              = app.server
+
 
 with open ("index.html", "r") as f:
     app.index_string    = f.read()
 
 
-# ambil data site_fish, observe_fish
-from curate import site_fish, observe_fish
+# data site_fish, observe_fish dimuat di background, layout bisa langsung disajikan
+import curate
+from filter_index import FilterIndex
+from cube import FilterCube, exact_distinct, month_number
+from figure_cache import FigureCache
+import table_query
+import histogram
+import sketch
+import metrics
+import pipeline
+import api
+import shared
+from sites import SiteDimension
+
+
+# dengan dataset bersama (serve.py) index sudah ditulis di folder yang sama dan dibuka lewat
+# memory map, jadi codes/posting list tidak disalin per worker
+def build_filter_index(observe_fish, site_fish):
+    folder = curate.data.shared_dir and shared.derived_folder(curate.data.shared_dir, "filter_index")
+    if folder:
+        return FilterIndex.attach(folder)
+    with metrics.timed("index_build"):
+        return FilterIndex(observe_fish)
+
+
+# MPA_DISTINCT=approx: distinct count species/site di cube dari union sketch HyperLogLog per sel
+# (galat relatif ~1.6% pada MPA_HLL_PRECISION=12, lihat sketch.distinct_error), tanpa tabel
+# keberadaan. seleksi dengan observasi <= MPA_DISTINCT_EXACT_ROWS tetap dihitung eksak dari baris
+distinct_approx     = os.environ.get("MPA_DISTINCT", "exact") == "approx"
+distinct_precision  = int(os.environ.get("MPA_HLL_PRECISION", sketch.DEFAULT_PRECISION))
+distinct_exact_rows = int(os.environ.get("MPA_DISTINCT_EXACT_ROWS", 20_000))
+
+
+def build_cube(observe_fish, site_fish):
+    with metrics.timed("cube_build"):
+        return FilterCube(observe_fish, distinct_approx, distinct_precision)
+
+
+# setelah ingest yang hanya menambah baris, index dan cube diperbarui dari baris baru saja
+def extend_filter_index(index, delta_observe, delta_site, observe_fish, site_fish):
+    with metrics.timed("index_extend"):
+        return index.extended(observe_fish)
+
+
+def extend_cube(cube, delta_observe, delta_site, observe_fish, site_fish):
+    with metrics.timed("cube_extend"):
+        return cube.extended(delta_observe)
+
+
+curate.data.register("filter_index", build_filter_index, extend_filter_index)
+curate.data.register("cube", build_cube, extend_cube)
+
+# warm-up dan watcher hanya di proses utama: worker pool ingest (spawn) mengimport ulang
+# modul ini sebagai __mp_main__ dan tidak boleh ikut memuat data / membuat pool sendiri.
+# (multiprocessing.parent_process() belum terisi selama import itu, jadi dicek dari nama modul)
+if __name__ != "__mp_main__":
+    curate.data.warm_up()
+
+    # cek workbook baru tiap MPA_INGEST_INTERVAL detik (server yang jalan lama, tanpa restart)
+    if os.environ.get("MPA_INGEST_INTERVAL"):
+        curate.data.watch(float(os.environ["MPA_INGEST_INTERVAL"]))
+
+# hasil render per kombinasi filter, batas ukuran bisa diatur lewat env MPA_FIGURE_CACHE_BYTES
+figure_cache = FigureCache(int(os.environ.get("MPA_FIGURE_CACHE_BYTES", 64 << 20)))
+
+
+# /metrics (format Prometheus) dan header Server-Timing per callback; MPA_METRICS=0 untuk mematikan
+@metrics.registry.collector
+def collect_app_metrics():
+    cache   = figure_cache.stats()
+    hits    = metrics.Counter("mpa_figure_cache_hits_total", "Figure cache hit")
+    misses  = metrics.Counter("mpa_figure_cache_misses_total", "Figure cache miss")
+    evicted = metrics.Counter("mpa_figure_cache_evictions_total", "Entry figure cache yang dibuang (LRU)")
+    size    = metrics.Gauge("mpa_figure_cache_bytes", "Total byte JSON di figure cache")
+    ratio   = metrics.Gauge("mpa_figure_cache_hit_ratio", "Rasio hit figure cache sejak start")
+    hits.inc(cache["hits"])
+    misses.inc(cache["misses"])
+    evicted.inc(cache["evictions"])
+    size.set(cache["bytes"])
+    ratio.set(cache["hit_rate"])
+
+    data    = metrics.Gauge("mpa_data_version", "Versi data curate (naik tiap load/reload)")
+    ready   = metrics.Gauge("mpa_data_ready", "1 kalau data sudah selesai dimuat")
+    data.set(curate.data.version)
+    ready.set(int(curate.data.ready()))
+
+    # hasil instrumentasi pipeline curate terakhir (kalau MPA_PIPE_TRACE hidup)
+    stages  = metrics.Gauge("mpa_pipeline_stage_seconds", "Durasi stage pipeline curate terakhir", ["pipeline", "stage"])
+    for name, trace in pipeline.last_traces().items():
+        for stage in trace.stages:
+            stages.set(stage["seconds"], pipeline=name, stage=stage["stage"])
+
+    api_stats   = api_cache.stats()
+    api_hits    = metrics.Counter("mpa_api_cache_hits_total", "Cache response /api hit")
+    api_misses  = metrics.Counter("mpa_api_cache_misses_total", "Cache response /api miss")
+    api_hits.inc(api_stats["hits"])
+    api_misses.inc(api_stats["misses"])
+
+    return [hits, misses, evicted, size, ratio, data, ready, stages, api_hits, api_misses]
+
+
+if os.environ.get("MPA_METRICS", "1") != "0":
+    metrics.install(app.server)
+
+
+# layout figure (template, margin, legend, sumbu) dibangun sekali di sini dan dikirim
+# bersama layout halaman; callback hanya mengirim trace lewat Patch
+colorway = px.colors.qualitative.Plotly
+
+
+def base_figure(height, **layout):
+    figure = go.Figure()
+    figure.update_layout(height=height, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark", **layout)
+    return figure
+
+
+def base_temporal_figure():
+    figure = make_subplots(specs=[[{"secondary_y": True}]])
+    figure.update_xaxes(title_text="Date")
+    figure.update_yaxes(title_text="Biomass (kg/ha)", secondary_y=False)
+    figure.update_yaxes(title_text="Density (n/ha)", secondary_y=True)
+    figure.update_layout(height=400, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark", legend=dict(orientation="h", yanchor="bottom", y=1.05, x=-0.05))
+    return figure
+
+
+base_figures = {
+    "biomass-boxplot"       : base_figure(400, xaxis_title="control/mpa", yaxis_title="biomass_(kg/ha)",
+                                          legend=dict(orientation="h", yanchor="bottom",y=1.05, x=-0.05)),
+    "trophic-diversity"     : base_figure(400, xaxis_title="trophic", yaxis_title="species", legend_title="trophic",
+                                          barmode="relative"),
+    "temporal-trends"       : base_temporal_figure(),
+    "size-distribution"     : base_figure(400, xaxis_title="size_(cm)", yaxis_title="count", legend_title="trophic",
+                                          barmode="relative", bargap=0,
+                                          legend=dict(orientation="v", yanchor="top", xanchor="left", y=0.95, x=1.06)),
+    "site-map"              : base_figure(600, mapbox=dict(style="carto-darkmatter", zoom=6), legend_title="mpa/control",
+                                          legend=dict(orientation="h", yanchor="bottom", xanchor="right", y=-0.1, x=1.0)),
+    "environmental-factors" : base_figure(600, xaxis_title="visibility", yaxis_title="biomass_(kg/ha)", legend_title="bleaching"),
+}
 
 
 
@@ -51,8 +205,7 @@ app.layout = dbc.Container([
                             html.Label("Year:"),
                             dcc.Dropdown(
                                 id='year-filter',
-                                options=[{'label': 'All', 'value': 'all'}] + 
-                                        [{'label': str(year), 'value': year} for year in sorted(observe_fish['year'].unique())],
+                                options=[{'label': 'All', 'value': 'all'}],
                                 value='all',
                                 clearable=False
                             )
@@ -61,8 +214,7 @@ app.layout = dbc.Container([
                             html.Label("MPA/Control:"),
                             dcc.Dropdown(
                                 id='mpa-control-filter',
-                                options=[{'label': 'All', 'value': 'all'}] + 
-                                        [{'label': val, 'value': val} for val in observe_fish['control/mpa'].unique()],
+                                options=[{'label': 'All', 'value': 'all'}],
                                 value='all',
                                 clearable=False
                             )
@@ -71,8 +223,7 @@ app.layout = dbc.Container([
                             html.Label("Trophic Level:"),
                             dcc.Dropdown(
                                 id='trophic-filter',
-                                options=[{'label': 'All', 'value': 'all'}] + 
-                                        [{'label': val, 'value': val} for val in observe_fish['trophic'].unique()],
+                                options=[{'label': 'All', 'value': 'all'}],
                                 value='all',
                                 clearable=False
                             )
@@ -81,13 +232,14 @@ app.layout = dbc.Container([
                             html.Label("Family:"),
                             dcc.Dropdown(
                                 id='family-filter',
-                                options=[{'label': 'All', 'value': 'all'}] + 
-                                        [{'label': val, 'value': val} for val in observe_fish['family'].unique()],
+                                options=[{'label': 'All', 'value': 'all'}],
                                 value='all',
                                 clearable=False
                             )
                         ], width=3)
-                    ], className="mt-2")
+                    ], className="mt-2"),
+                    # cek tiap 500ms sampai data selesai dimuat, lalu isi pilihan filter
+                    dcc.Interval(id='data-warmup', interval=500)
                 ])
             ])
         ])
@@ -135,7 +287,7 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Biomass Distribution by MPA/Control"),
-                    dcc.Graph(id="biomass-boxplot")
+                    dcc.Graph(id="biomass-boxplot", figure=base_figures["biomass-boxplot"])
                 ])
             ])
         ], width=6),
@@ -143,7 +295,7 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Species Diversity by Trophic Level"),
-                    dcc.Graph(id="trophic-diversity")
+                    dcc.Graph(id="trophic-diversity", figure=base_figures["trophic-diversity"])
                 ])
             ])
         ], width=6)
@@ -155,7 +307,24 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Temporal Trends"),
-                    dcc.Graph(id="temporal-trends")
+                    dcc.Graph(id="temporal-trends", figure=base_figures["temporal-trends"]),
+                    dbc.Row([
+                        dbc.Col([
+                            # nilai slider = nomor bulan (cube.month_number), diisi populate_filters
+                            dcc.RangeSlider(id='temporal-range', min=0, max=0, step=1, value=None,
+                                            allowCross=False, updatemode='mouseup')
+                        ], width=9),
+                        dbc.Col([
+                            dcc.Dropdown(
+                                id='temporal-resample',
+                                options=[{'label': 'Monthly', 'value': 'monthly'},
+                                         {'label': 'Quarterly', 'value': 'quarterly'},
+                                         {'label': 'Yearly', 'value': 'yearly'}],
+                                value='monthly',
+                                clearable=False
+                            )
+                        ], width=3)
+                    ], className="mt-2", align="center")
                 ])
             ])
         ], width=7),
@@ -163,7 +332,7 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Size Distribution"),
-                    dcc.Graph(id="size-distribution")
+                    dcc.Graph(id="size-distribution", figure=base_figures["size-distribution"])
                 ])
             ])
         ], width=5)
@@ -175,7 +344,13 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Site Locations"),
-                    dcc.Graph(id="site-map", config={'scrollZoom': True})
+                    dcc.Graph(id="site-map", figure=base_figures["site-map"], config={'scrollZoom': True}),
+                    # trace peta (posisi, customdata) per versi data, dikirim sekali per client;
+                    # per filter hanya posisi site yang tampil + ukuran marker
+                    dcc.Store(id="site-map-layer"),
+                    dcc.Store(id="site-map-points"),
+                    # versi data yang trace petanya sudah ada di browser
+                    dcc.Store(id="site-map-version")
                 ])
             ])
         ], width=8),
@@ -183,7 +358,7 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H5("Environmental Factors"),
-                    dcc.Graph(id="environmental-factors")
+                    dcc.Graph(id="environmental-factors", figure=base_figures["environmental-factors"])
                 ])
             ])
         ], width=4)
@@ -199,9 +374,15 @@ app.layout = dbc.Container([
                         id='summary-table',
                         columns=[],
                         data=[],
+                        page_current=0,
                         page_size=10,
-                        sort_action="native",
-                        filter_action="native",
+                        # paging, sort dan filter dikerjakan di server (lihat update_summary_table)
+                        page_action="custom",
+                        sort_action="custom",
+                        sort_mode="multi",
+                        sort_by=[],
+                        filter_action="custom",
+                        filter_query="",
                         # style_cell={'textAlign': 'left', 'fontSize': 12},
                         # style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'},
                         style_cell={
@@ -238,128 +419,494 @@ app.layout = dbc.Container([
 
 
 
-# Callback for updating all visualizations based on filters
+# Isi pilihan dropdown setelah data selesai dimuat
+@app.callback(
+    [Output('year-filter', 'options'),
+     Output('mpa-control-filter', 'options'),
+     Output('trophic-filter', 'options'),
+     Output('family-filter', 'options'),
+     Output('temporal-range', 'min'),
+     Output('temporal-range', 'max'),
+     Output('temporal-range', 'marks'),
+     Output('temporal-range', 'value'),
+     Output('data-warmup', 'disabled')],
+    [Input('data-warmup', 'n_intervals')]
+)
+def populate_filters(n_intervals):
+    if not curate.data.ready():
+        raise PreventUpdate
+
+    observe_fish = curate.data.observe_fish
+    all_option   = [{'label': 'All', 'value': 'all'}]
+    first, last  = temporal_bounds()
+
+    return (all_option + [{'label': str(year), 'value': year} for year in sorted(observe_fish['year'].unique())],
+            all_option + [{'label': val, 'value': val} for val in observe_fish['control/mpa'].unique()],
+            all_option + [{'label': val, 'value': val} for val in observe_fish['trophic'].unique()],
+            all_option + [{'label': val, 'value': val} for val in observe_fish['family'].unique()],
+            first, last, temporal_marks(first, last), [first, last],
+            True)
+
+
+# rentang nomor bulan seluruh data, dari rollup bulanan cube tanpa filter
+def temporal_bounds():
+    months = month_number(*aggregates_for('all', 'all', 'all', 'all')['monthly'][['year', 'month']].to_numpy().T)
+    return (int(months.min()), int(months.max())) if len(months) else (0, 0)
+
+
+# satu label per awal tahun, dijarangkan supaya tidak lebih dari ~12 label
+def temporal_marks(first, last):
+    years = list(range(-(-first // 12), last // 12 + 1))
+    step  = max(1, -(-len(years) // 12))
+    return {year * 12: str(year) for year in years[::step]}
+
+
+# semua panel memakai empat filter yang sama
+filter_inputs = [Input('mpa-control-filter', 'value'),
+                 Input('year-filter', 'value'),
+                 Input('trophic-filter', 'value'),
+                 Input('family-filter', 'value')]
+
+
+# subset baris per kombinasi filter, dipakai bersama oleh callback panel yang jalan paralel.
+# callback pertama yang butuh subset menghitungnya, callback lain menunggu hasil yang sama.
+# subset yang sudah jadi disimpan LRU dengan batas total byte (memory_usage deep), bukan
+# jumlah entry, karena subset kombinasi 'all' bisa hampir sebesar seluruh data.
+# batas bisa diatur lewat env MPA_SUBSET_CACHE_BYTES
+subset_cache_bytes  = int(os.environ.get("MPA_SUBSET_CACHE_BYTES", 64 << 20))
+
+_subset_lock        = threading.Lock()
+_subset_cache       = OrderedDict()
+_subset_sizes       = {}
+
+
+def clear_subsets():
+    with _subset_lock:
+        _subset_cache.clear()
+        _subset_sizes.clear()
+
+
+def filtered_rows(*filters):
+    with metrics.timed("filter"):
+        return _filtered_rows(*filters)
+
+
+def _filtered_rows(mpa_control, year, trophic, family):
+    observe_fish, site_fish = curate.data.load()
+    key = (curate.data.version, mpa_control, year, trophic, family)
+
+    with _subset_lock:
+        future = _subset_cache.get(key)
+        owner  = future is None
+        if owner:
+            future = _subset_cache[key] = Future()
+        else:
+            _subset_cache.move_to_end(key)
+
+    if owner:
+        try:
+            subset = curate.data.get("filter_index").select(observe_fish, {
+                'control/mpa'   : mpa_control,
+                'year'          : year,
+                'trophic'       : trophic,
+                'family'        : family,
+            })
+        except Exception as exc:
+            # subset yang gagal tidak disimpan, request berikutnya menghitung ulang
+            with _subset_lock:
+                if _subset_cache.get(key) is future:
+                    del _subset_cache[key]
+            future.set_exception(exc)
+        else:
+            future.set_result(subset)
+            _keep_subset(key, future, int(subset.memory_usage(deep=True).sum()))
+
+    return future.result()
+
+
+# catat ukuran subset yang selesai lalu buang entry terlama sampai total di bawah batas
+# (subset yang lebih besar dari batas langsung ikut terbuang)
+def _keep_subset(key, future, size):
+    with _subset_lock:
+        if _subset_cache.get(key) is not future:
+            return
+        _subset_sizes[key] = size
+        while _subset_cache and sum(_subset_sizes.values()) > subset_cache_bytes:
+            evicted, _ = _subset_cache.popitem(last=False)
+            _subset_sizes.pop(evicted, None)
+
+
+# agregat kombinasi filter dari cube
+def aggregates_for(mpa_control, year, trophic, family):
+    with metrics.timed("cube"):
+        cube    = curate.data.get("cube")
+        result  = cube.lookup(mpa_control, year, trophic, family)
+    if cube.approximate and 0 < result['kpis']['total_obs'] <= distinct_exact_rows:
+        return _exact_aggregates(curate.data.version, mpa_control, year, trophic, family)
+    return result
+
+
+# seleksi kecil saat cube memakai sketch: distinct count eksak dari baris terpilih, per versi data
+@functools.lru_cache(64)
+def _exact_aggregates(version, *filters):
+    result  = curate.data.get("cube").lookup(*filters)
+    rows    = filtered_rows(*filters)
+    with metrics.timed("distinct_exact"):
+        return exact_distinct(result, rows)
+
+
+def data_version():
+    curate.data.load()
+    return curate.data.version
+
+
+# /api/v1/<tabel>: agregat yang sama sebagai JSON / Arrow untuk tim lain, tanpa render figure
+# (lihat api.py). response di-cache terpisah dari figure; MPA_API=0 untuk mematikan
+api_cache = FigureCache(int(os.environ.get("MPA_API_CACHE_BYTES", 16 << 20)))
+
+if os.environ.get("MPA_API", "1") != "0":
+    api.install(app.server, aggregates_for, data_version, api_cache)
+
+
+# user sering bolak-balik di kombinasi filter yang sama, hasil render tiap panel disimpan
+# per (panel, filter, versi data); reload data otomatis mengosongkan cache.
+# fase build sudah termasuk filter/cube di dalamnya, serialize = to_json saat disimpan ke cache
+def cached_panel(panel, filters, build):
+    curate.data.load()
+    key     = (panel,) + tuple(filters)
+    version = curate.data.version
+
+    with metrics.timed("cache"):
+        value = figure_cache.get(key, version)
+    if value is None:
+        with metrics.timed("build"):
+            value = build(*filters)
+        with metrics.timed("serialize"):
+            figure_cache.put(key, version, value)
+    return value
+
+
+# Tiap panel punya callback sendiri. Dash mengirim satu request per callback dan server
+# (threaded) menjalankannya bersamaan, jadi KPI yang murah langsung tampil tanpa menunggu
+# peta/tabel, dan total waktu mendekati panel paling lambat, bukan jumlah semua panel
+
+# Key metrics
 @app.callback(
-        
     [Output('total-observations', 'children'),
      Output('total-species', 'children'),
      Output('avg-biomass', 'children'),
-     Output('total-sites', 'children'),
-     Output('biomass-boxplot', 'figure'),
-     Output('trophic-diversity', 'figure'),
-     Output('temporal-trends', 'figure'),
-     Output('size-distribution', 'figure'),
-     Output('site-map', 'figure'),
-     Output('environmental-factors', 'figure'),
-     Output('summary-table', 'data'),
-     Output('summary-table', 'columns')],
-
-    [Input('mpa-control-filter', 'value'),
-     Input('year-filter', 'value'),
-     Input('trophic-filter', 'value'),
-     Input('family-filter', 'value')]
+     Output('total-sites', 'children')],
+    filter_inputs
 )
-def update_dashboard(mpa_control, year, trophic, family):
-    # Filter the data based on selections
-    filtered_data = observe_fish.copy()
-    
-    if mpa_control != 'all':
-        filtered_data = filtered_data[filtered_data['control/mpa'] == mpa_control]
-    if year != 'all':
-        filtered_data = filtered_data[filtered_data['year'] == year]
-    if trophic != 'all':
-        filtered_data = filtered_data[filtered_data['trophic'] == trophic]
-    if family != 'all':
-        filtered_data = filtered_data[filtered_data['family'] == family]
-    
-    # Calculate metrics
-    total_obs = len(filtered_data)
-    unique_species = filtered_data['species'].nunique()
-    avg_biomass = f"{filtered_data['biomass_(kg/ha)'].mean():.2f}"
-    total_sites = filtered_data['site_name'].nunique()
-    
-    # Create visualizations
-    
-    # 1. Biomass boxplot
-    biomass_fig = px.box(filtered_data, x='control/mpa', y='biomass_(kg/ha)', 
-                        color='control/mpa', title="", template="plotly_dark")
-    biomass_fig.update_layout(height=400, margin=dict(t=20, b=20, l=20, r=20), legend=dict(orientation="h", yanchor="bottom",y=1.05, x=-0.05))
-    
-    # 2. Trophic diversity
-    trophic_counts = filtered_data.groupby('trophic')['species'].nunique().reset_index()
-    trophic_fig = px.bar(trophic_counts, x='trophic', y='species', 
-                        color='trophic', title="", template="plotly_dark")
-    trophic_fig.update_layout(height=400, margin=dict(t=20, b=20, l=20, r=20))
-    
-    # 3. Temporal trends
-    temporal_data = filtered_data.groupby(['year', 'month']).agg({
-        'biomass_(kg/ha)': 'mean',
-        'density_(n/ha)': 'mean'
-    }).reset_index()
-    temporal_data['date'] = pd.to_datetime(temporal_data[['year', 'month']].assign(day=1))
-    
-    temporal_fig = make_subplots(specs=[[{"secondary_y": True}]])
-    temporal_fig.add_trace(
-        go.Scatter(x=temporal_data['date'], y=temporal_data['biomass_(kg/ha)'], 
-                  name="Biomass", line=dict(color="skyblue")),
-        secondary_y=False
-    )
-    temporal_fig.add_trace(
-        go.Scatter(x=temporal_data['date'], y=temporal_data['density_(n/ha)'], 
-                  name="Density", line=dict(color="yellow")),
-        secondary_y=True
-    )
-    temporal_fig.update_xaxes(title_text="Date")
-    temporal_fig.update_yaxes(title_text="Biomass (kg/ha)", secondary_y=False)
-    temporal_fig.update_yaxes(title_text="Density (n/ha)", secondary_y=True)
-    temporal_fig.update_layout(height=400, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark", legend=dict(orientation="h", yanchor="bottom", y=1.05, x=-0.05))
-    
-    # 4. Size distribution
-    size_fig = px.histogram(filtered_data, x='size_(cm)', nbins=20, 
-                           color='trophic', title="")
-    size_fig.update_layout(height=400, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark", legend=dict(orientation="v", yanchor="top", xanchor="left", y=0.95, x=1.06))
-    
-    # 5. Site map
-    site_data = site_fish.merge(
-        filtered_data.groupby('sea_site_id').agg({
-            'biomass_(kg/ha)': 'mean',
-            'density_(n/ha)': 'mean'
-        }).reset_index(),
-        on='sea_site_id', how='inner'
-    )
-    
-    map_fig = px.scatter_mapbox(site_data, lat="latitude", lon="longitude",
-                               size="biomass_(kg/ha)", color="mpa/control",
-                               hover_data=["site_name", "mpa"],
-                               mapbox_style="carto-darkmatter",
-                               zoom=6)
-    map_fig.update_layout(height=600, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark", legend=dict(orientation="h", yanchor="bottom", xanchor="right", y=-0.1, x=1.0))
-    
-    # 6. Environmental factors
-    env_data = site_fish.merge(
-        filtered_data.groupby('sea_site_id')['biomass_(kg/ha)'].mean().reset_index(),
-        on='sea_site_id', how='inner'
-    )
-    env_fig = px.scatter(env_data, x='visibility', y='biomass_(kg/ha)',
-                        color='bleaching', size='biomass_(kg/ha)',
-                        title="")
-    env_fig.update_layout(height=600, margin=dict(t=20, b=20, l=20, r=20), template="plotly_dark")
-    
-    # 7. Summary table
-    summary_data = filtered_data.groupby(['family', 'trophic', 'control/mpa']).agg({
-        'species': 'nunique',
-        'biomass_(kg/ha)': 'mean',
-        'density_(n/ha)': 'mean',
-        'size_(cm)': 'mean'
-    }).round(2).reset_index()
-    
-    summary_columns = [{"name": col, "id": col} for col in summary_data.columns]
-    summary_data_dict = summary_data.to_dict('records')
-    
-    return (f"{total_obs:,}", f"{unique_species:,}", avg_biomass, f"{total_sites:,}",
-            biomass_fig, trophic_fig, temporal_fig, size_fig, map_fig, env_fig,
-            summary_data_dict, summary_columns)
+def update_kpis(mpa_control, year, trophic, family):
+    kpis = aggregates_for(mpa_control, year, trophic, family)['kpis']
+
+    total_obs = kpis['total_obs']
+    unique_species = kpis['unique_species']
+    avg_biomass = f"{kpis['avg_biomass']:.2f}"
+    total_sites = kpis['total_sites']
+
+    return f"{total_obs:,}", f"{unique_species:,}", avg_biomass, f"{total_sites:,}"
+
+
+# Semua grafik memakai figure awal dari base_figures (layout dibangun sekali). build_* hanya
+# membuat trace (dict biasa, tanpa validasi plotly) dan callback mengirimnya lewat dash Patch,
+# jadi template/margin/legend tidak ikut dikirim ulang tiap filter berubah
+def patched_panel(panel, filters, build):
+    patch           = Patch()
+    patch['data']   = cached_panel(panel, filters, build)['data']
+    return patch
+
+
+# satu trace per nilai kolom warna, urut kemunculan pertama dan warna dari colorway (sama dengan px)
+def color_groups(df, column):
+    codes, groups = pd.factorize(df[column])
+    for i, group in enumerate(groups):
+        yield str(group), colorway[i % len(colorway)], df[codes == i]
+
+
+# skala ukuran marker ala px (sizemode area, marker terbesar 20px), dihitung dari semua trace
+def area_sizeref(largest):
+    return 2.0 * largest / 20 ** 2 if largest > 0 else 1
+
+
+# 1. Biomass boxplot
+# box digambar dari statistik yang dihitung di server (kuartil, whisker, outlier dibatasi),
+# bukan dari semua nilai biomass. seleksi kecil dihitung eksak dari baris,
+# seleksi besar dari gabungan quantile sketch per sel cube (tanpa membaca baris)
+box_exact_rows = int(os.environ.get("MPA_BOX_EXACT_ROWS", 20_000))
+
+
+def biomass_box_stats(*filters):
+    if aggregates_for(*filters)['kpis']['total_obs'] > box_exact_rows:
+        with metrics.timed("box_sketch"):
+            return curate.data.get("cube").box_stats(*filters)
+
+    filtered_data = filtered_rows(*filters)
+    with metrics.timed("box_exact"):
+        return {group: sketch.box_stats(values)
+                for group, values in filtered_data.groupby('control/mpa', observed=True)['biomass_(kg/ha)']}
+
+
+def build_biomass_boxplot(*filters):
+    traces = []
+    for i, (group, stats) in enumerate(biomass_box_stats(*filters).items()):
+        # grup yang semua biomass-nya kosong tidak punya statistik, tidak digambar
+        if stats is None:
+            continue
+        color = colorway[i % len(colorway)]
+        traces.append({
+            'type': 'box', 'x': [group], 'name': group, 'legendgroup': group, 'marker': {'color': color},
+            'q1': [stats['q1']], 'median': [stats['median']], 'q3': [stats['q3']],
+            'lowerfence': [stats['lowerfence']], 'upperfence': [stats['upperfence']],
+        })
+        traces.append({
+            'type': 'scatter', 'mode': 'markers', 'x': [group] * len(stats['outliers']), 'y': stats['outliers'],
+            'legendgroup': group, 'showlegend': False, 'marker': {'color': color, 'size': 4},
+        })
+    return {'data': traces}
+
+
+@app.callback(Output('biomass-boxplot', 'figure'), filter_inputs)
+def update_biomass_boxplot(*filters):
+    return patched_panel('biomass-boxplot', filters, build_biomass_boxplot)
+
+
+# 2. Trophic diversity
+def build_trophic_diversity(*filters):
+    trophic_counts = aggregates_for(*filters)['trophic']
+
+    return {'data': [
+        {'type': 'bar', 'x': [name], 'y': group['species'].to_numpy(), 'name': name, 'legendgroup': name,
+         'marker': {'color': color}, 'hovertemplate': 'trophic=%{x}<br>species=%{y}<extra></extra>'}
+        for name, color, group in color_groups(trophic_counts, 'trophic')
+    ]}
+
+
+@app.callback(Output('trophic-diversity', 'figure'), filter_inputs)
+def update_trophic_diversity(*filters):
+    return patched_panel('trophic-diversity', filters, build_trophic_diversity)
+
+
+# 3. Temporal trends
+# deret dihitung dari rollup bulanan cube (sum + count per bulan per kombinasi filter):
+# potong rentang slider lalu resample per bulan/kuartal/tahun, tanpa membaca baris observasi
+def build_temporal_trends(mpa_control, year, trophic, family, time_range=None, resample='monthly'):
+    start, stop = time_range if time_range else (None, None)
+    with metrics.timed("cube"):
+        temporal_data = curate.data.get("cube").temporal(mpa_control, year, trophic, family, start, stop, resample)
+    dates = [f"{year}-{month:02d}-01" for year, month in zip(temporal_data['year'], temporal_data['month'])]
+
+    return {'data': [
+        {'type': 'scatter', 'x': dates, 'y': temporal_data['biomass_(kg/ha)'].round(3).to_numpy(),
+         'name': "Biomass", 'line': {'color': "skyblue"}, 'yaxis': 'y'},
+        {'type': 'scatter', 'x': dates, 'y': temporal_data['density_(n/ha)'].round(3).to_numpy(),
+         'name': "Density", 'line': {'color': "yellow"}, 'yaxis': 'y2'},
+    ]}
+
+
+@app.callback(Output('temporal-trends', 'figure'),
+              filter_inputs + [Input('temporal-range', 'value'), Input('temporal-resample', 'value')])
+def update_temporal_trends(mpa_control, year, trophic, family, time_range, resample):
+    time_range = tuple(time_range) if time_range else None
+    return patched_panel('temporal-trends', (mpa_control, year, trophic, family, time_range, resample),
+                         build_temporal_trends)
+
+
+# 4. Size distribution
+# bin dihitung di server (histogram.binned_counts), figure hanya berisi jumlah per bin per trophic
+def build_size_distribution(*filters):
+    filtered_data = filtered_rows(*filters)
+
+    with metrics.timed("binning"):
+        size_counts, bin_width = histogram.binned_counts(filtered_data, 'size_(cm)', 'trophic', nbins=20)
+
+    return {'data': [
+        {'type': 'bar', 'x': group['size_(cm)'].to_numpy(), 'y': group['count'].to_numpy(), 'width': bin_width,
+         'name': name, 'legendgroup': name, 'marker': {'color': color},
+         'hovertemplate': 'trophic=' + name + '<br>size_(cm)=%{x}<br>count=%{y}<extra></extra>'}
+        for name, color, group in color_groups(size_counts, 'trophic')
+    ]}
+
+
+@app.callback(Output('size-distribution', 'figure'), filter_inputs)
+def update_size_distribution(*filters):
+    return patched_panel('size-distribution', filters, build_size_distribution)
+
+
+# Panel site (peta dan environmental factors) memakai site_fish sebagai tabel dimensi
+# (sites.SiteDimension, dibangun sekali per versi data) dan satu agregat biomass per site
+# per kombinasi filter dari cube, disebar ke baris dimensi lewat kode site (tanpa merge)
+def build_site_dim(observe_fish, site_fish):
+    site_ids = observe_fish['sea_site_id']
+    if isinstance(site_ids.dtype, pd.CategoricalDtype):
+        return SiteDimension(site_fish, site_ids.cat.categories)
+    return SiteDimension(site_fish, site_ids.unique())
+
+
+curate.data.register("site_dim", build_site_dim)
+
+
+@functools.lru_cache(maxsize=64)
+def _site_biomass(version, *filters):
+    return curate.data.get("site_dim").aligned(aggregates_for(*filters)['sites'], 'biomass_(kg/ha)')
+
+
+# biomass rata-rata tiap baris dimensi site (urutan site_fish), NaN = tidak ada data untuk filter ini
+def site_biomass(*filters):
+    return _site_biomass(data_version(), *filters)
+
+
+# kosongkan semua cache hasil per kombinasi filter (subset baris, agregat eksak, biomass site),
+# misalnya supaya bench bisa mengukur panel tanpa cache
+def clear_caches():
+    clear_subsets()
+    _exact_aggregates.cache_clear()
+    _site_biomass.cache_clear()
+
+
+# 5. Site map
+# trace per mpa/control (posisi, warna, hover, customdata) hanya bergantung pada data (bukan filter),
+# jadi dibangun sekali per versi data dan dikirim sekali per client ke dcc.Store site-map-layer
+# (versinya dicatat di site-map-version). perubahan filter hanya mengirim posisi site (dalam
+# trace) yang punya data untuk filter itu + ukuran marker = biomass ke site-map-points; titiknya
+# diambil dari layer di browser (clientside callback), jadi lat/lon/customdata tidak dikirim ulang
+def build_site_layer(observe_fish, site_fish):
+    traces, rows = [], []
+    for name, color, group in color_groups(site_fish.reset_index(drop=True), 'mpa/control'):
+        rows.append(group.index.to_numpy())
+        traces.append({
+            'type': 'scattermapbox', 'lat': group['latitude'].round(5).to_numpy(),
+            'lon': group['longitude'].round(5).to_numpy(), 'name': name, 'legendgroup': name,
+            'customdata': group[['site_name', 'mpa']].astype(str).to_numpy(),
+            'marker': {'color': color, 'sizemode': 'area'},
+            'hovertemplate': ('mpa/control=' + name + '<br>biomass_(kg/ha)=%{marker.size}<br>latitude=%{lat}'
+                              '<br>longitude=%{lon}<br>site_name=%{customdata[0]}<br>mpa=%{customdata[1]}<extra></extra>'),
+        })
+    center = {'lat': float(site_fish['latitude'].mean()), 'lon': float(site_fish['longitude'].mean())}
+    return {'traces': traces, 'rows': rows, 'center': center}
+
+
+curate.data.register("site_layer", build_site_layer)
+
+
+# hanya site yang punya observasi untuk filter ini yang digambar (site tanpa data tidak
+# muncul, bukan marker ukuran 0): per trace posisi titiknya di layer + ukurannya
+def build_site_map(*filters):
+    layer   = curate.data.get("site_layer")
+    biomass = site_biomass(*filters)
+
+    points = []
+    for rows in layer['rows']:
+        values  = biomass[rows]
+        present = ~np.isnan(values)
+        points.append({'index': np.nonzero(present)[0], 'size': values[present].round(2)})
+    largest = max((p['size'].max() for p in points if len(p['size'])), default=0)
+    return {'points': points, 'sizeref': area_sizeref(largest)}
+
+
+@app.callback(
+    [Output('site-map-points', 'data'),
+     Output('site-map-layer', 'data'),
+     Output('site-map-version', 'data')],
+    filter_inputs +
+    [State('site-map-version', 'data')]
+)
+def update_site_map(mpa_control, year, trophic, family, client_version):
+    filters = (mpa_control, year, trophic, family)
+    layer   = curate.data.get("site_layer")
+    version = curate.data.version
+    sites   = cached_panel('site-map', filters, build_site_map)
+
+    shown = {'version': version, 'points': sites['points'], 'sizeref': sites['sizeref']}
+    if client_version == version:
+        return shown, dash.no_update, dash.no_update
+    return shown, {'version': version, 'traces': layer['traces'], 'center': layer['center']}, version
+
+
+# trace yang tampil = titik layer di posisi site-map-points; kalau versi keduanya belum sama
+# (layer versi baru belum sampai) peta dibiarkan dulu
+app.clientside_callback(
+    """
+    function(shown, layer, figure) {
+        if (!shown || !layer || shown.version !== layer.version) {
+            return window.dash_clientside.no_update;
+        }
+        const data = layer.traces.map(function(trace, i) {
+            const points = shown.points[i];
+            const pick = function(values) { return points.index.map(function(j) { return values[j]; }); };
+            return Object.assign({}, trace, {
+                lat: pick(trace.lat), lon: pick(trace.lon), customdata: pick(trace.customdata),
+                marker: Object.assign({}, trace.marker, {size: points.size, sizeref: shown.sizeref})
+            });
+        });
+        // pusat peta hanya diisi saat layer baru tiba, geser/zoom pengguna tetap saat filter berubah
+        const triggered = window.dash_clientside.callback_context.triggered.map(function(t) { return t.prop_id; });
+        if (triggered.indexOf('site-map-layer.data') < 0) {
+            return Object.assign({}, figure, {data: data});
+        }
+        const mapbox = Object.assign({}, figure.layout.mapbox, {center: layer.center});
+        return Object.assign({}, figure, {data: data, layout: Object.assign({}, figure.layout, {mapbox: mapbox})});
+    }
+    """,
+    Output('site-map', 'figure'),
+    [Input('site-map-points', 'data'),
+     Input('site-map-layer', 'data')],
+    [State('site-map', 'figure')]
+)
+
+
+# 6. Environmental factors
+def build_environmental_factors(*filters):
+    biomass = site_biomass(*filters)
+    present = ~np.isnan(biomass)
+
+    env_data = curate.data.get("site_dim").frame[present].assign(**{'biomass_(kg/ha)': biomass[present]})
+    sizeref = area_sizeref(env_data['biomass_(kg/ha)'].max())
+    return {'data': [
+        {'type': 'scatter', 'mode': 'markers', 'x': group['visibility'].to_numpy(),
+         'y': group['biomass_(kg/ha)'].round(3).to_numpy(), 'name': name, 'legendgroup': name,
+         'marker': {'color': color, 'size': group['biomass_(kg/ha)'].round(2).to_numpy(),
+                    'sizemode': 'area', 'sizeref': sizeref},
+         'hovertemplate': 'bleaching=' + name + '<br>visibility=%{x}<br>biomass_(kg/ha)=%{y}<extra></extra>'}
+        for name, color, group in color_groups(env_data, 'bleaching')
+    ]}
+
+
+@app.callback(Output('environmental-factors', 'figure'), filter_inputs)
+def update_environmental_factors(*filters):
+    return patched_panel('environmental-factors', filters, build_environmental_factors)
+
+
+# 7. Summary table
+# agregat lengkap tetap di server, browser hanya menerima halaman yang sedang dilihat
+@app.callback(
+    [Output('summary-table', 'data'),
+     Output('summary-table', 'columns'),
+     Output('summary-table', 'page_count'),
+     Output('summary-table', 'page_current')],
+    filter_inputs +
+    [Input('summary-table', 'page_current'),
+     Input('summary-table', 'page_size'),
+     Input('summary-table', 'sort_by'),
+     Input('summary-table', 'filter_query')]
+)
+def update_summary_table(mpa_control, year, trophic, family, page_current, page_size, sort_by, filter_query):
+    summary_data = aggregates_for(mpa_control, year, trophic, family)['summary'].round(2)
+
+    summary_columns = [{"name": col, "id": col,
+                        "type": "numeric" if pd.api.types.is_numeric_dtype(summary_data[col]) else "text"}
+                       for col in summary_data.columns]
+
+    # filter dropdown berubah -> kembali ke halaman pertama
+    if ctx.triggered_id in ('mpa-control-filter', 'year-filter', 'trophic-filter', 'family-filter'):
+        page_current = 0
+
+    with metrics.timed("query"):
+        summary_data = table_query.apply_query(summary_data, filter_query, sort_by)
+        summary_data_dict, page_count, page_current = table_query.page_records(summary_data, page_current, page_size)
+    return summary_data_dict, summary_columns, page_count, page_current
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
\ No newline at end of file
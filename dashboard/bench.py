@@ -0,0 +1,274 @@
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+import curate
+import synth
+
+
+# benchmark curate pipeline dan panel dashboard dengan data sintetis.
+#
+#   python bench.py run --rows 10000 100000 1000000 --out bench_results.json
+#   python bench.py compare base.json head.json
+#
+# hasilnya JSON (satu record per stage/panel/ukuran) supaya bisa dibandingkan antar commit
+
+
+# kombinasi filter yang mewakili pemakaian dashboard; nilai diisi dari data
+FILTER_MIXES = {
+    "all"               : [],
+    "year"              : ["year"],
+    "mpa_year"          : ["control/mpa", "year"],
+    "trophic_family"    : ["trophic", "family"],
+    "all_four"          : ["control/mpa", "year", "trophic", "family"],
+}
+
+FILTER_DIMS = ["control/mpa", "year", "trophic", "family"]
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux dalam KiB, macOS dalam byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# jalankan fn() sekali, return (hasil, detik, peak byte alokasi kalau trace_memory)
+def _measure(fn, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start   = time.perf_counter()
+    result  = fn()
+    seconds = time.perf_counter() - start
+    peak    = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _record(results, rows, group, name, seconds, peaks, **extra):
+    peaks = [p for p in peaks if p is not None]
+    results.append(dict({
+        "rows"          : rows,
+        "group"         : group,
+        "name"          : name,
+        "seconds"       : min(seconds),
+        "seconds_all"   : seconds,
+        "peak_bytes"    : max(peaks) if peaks else None,
+    }, **extra))
+
+
+def _n_sites(rows):
+    return int(np.clip(np.sqrt(rows) / 2, 60, 5000))
+
+
+# waktu tiap stage curate; frame mentah dicopy ulang tiap putaran (copy tidak ikut diukur)
+def bench_curate(results, rows, repeat, trace_memory):
+    n_sites     = _n_sites(rows)
+    pipelines   = [
+        ("observe_fish", synth.make_measure_df(rows, n_sites=n_sites),
+         curate.measure_stages + [curate.measure_df_apply_schema]),
+        ("site_fish", synth.make_site_df(n_sites, surveys_per_site=4),
+         curate.site_stages + [curate.site_df_apply_schema]),
+    ]
+
+    for pipeline, raw, stages in pipelines:
+        timings = {stage.__name__: ([], []) for stage in stages}
+        for _ in range(repeat):
+            df = raw.copy()
+            for stage in stages:
+                df, seconds, peak = _measure(lambda: stage(df), trace_memory)
+                timings[stage.__name__][0].append(seconds)
+                timings[stage.__name__][1].append(peak)
+
+        for stage in stages:
+            seconds, peaks = timings[stage.__name__]
+            _record(results, rows, "curate", stage.__name__, seconds, peaks,
+                    pipeline=pipeline, rows_in=len(raw))
+
+
+def _filter_values(observe_fish):
+    values = {}
+    for dim in FILTER_DIMS:
+        top = observe_fish[dim].value_counts().index[0]
+        values[dim] = top.item() if isinstance(top, np.generic) else top
+    return values
+
+
+# waktu build index/cube dan tiap panel dashboard per kombinasi filter.
+# seconds panel = cold: cache per kombinasi filter (subset, agregat eksak, biomass site)
+# dikosongkan sebelum tiap putaran, objek turunan (index, cube, dimensi site) tetap ada.
+# warm_seconds = putaran berikutnya tanpa mengosongkan cache (kombinasi yang baru dibuka lagi)
+def bench_dashboard(results, rows, repeat, trace_memory):
+    n_sites         = _n_sites(rows)
+    observe_fish    = synth.make_observe_fish(rows, n_sites=n_sites)
+    site_fish       = curate.clean_site_df(synth.make_site_df(n_sites))
+    curate.data.replace(observe_fish, site_fish)
+
+    # import app setelah data diganti, supaya warm-up tidak membaca dataset asli
+    import app
+    import table_query
+    from cube import FilterCube
+    from filter_index import FilterIndex
+    from plotly.io.json import to_json_plotly
+
+    for name, build in [("filter_index", FilterIndex), ("cube", FilterCube)]:
+        seconds, peaks = [], []
+        for _ in range(repeat):
+            _, sec, peak = _measure(lambda: build(observe_fish), trace_memory)
+            seconds.append(sec)
+            peaks.append(peak)
+        _record(results, rows, "build", name, seconds, peaks)
+        curate.data.get(name)
+
+    panels = {
+        "kpis"                  : app.update_kpis,
+        "biomass-boxplot"       : app.build_biomass_boxplot,
+        "trophic-diversity"     : app.build_trophic_diversity,
+        "temporal-trends"       : app.build_temporal_trends,
+        "size-distribution"     : app.build_size_distribution,
+        "site-map"              : app.build_site_map,
+        "environmental-factors" : app.build_environmental_factors,
+        "summary-table"         : lambda *f: table_query.page_records(app.aggregates_for(*f)['summary'].round(2), 0, 10)[0],
+    }
+
+    values = _filter_values(observe_fish)
+    for mix, dims in FILTER_MIXES.items():
+        filters = tuple(values[dim] if dim in dims else 'all' for dim in FILTER_DIMS)
+
+        seconds, peaks = [], []
+        for _ in range(repeat):
+            app.clear_caches()
+            subset, sec, peak = _measure(lambda: app.filtered_rows(*filters), trace_memory)
+            seconds.append(sec)
+            peaks.append(peak)
+        _record(results, rows, "dashboard", "filter", seconds, peaks, filters=mix, rows_out=len(subset))
+
+        for name, build in panels.items():
+            seconds, peaks, serialize = [], [], []
+            for _ in range(repeat):
+                app.clear_caches()
+                output, sec, peak = _measure(lambda: build(*filters), trace_memory)
+                seconds.append(sec)
+                peaks.append(peak)
+
+                start   = time.perf_counter()
+                payload = to_json_plotly(output)
+                serialize.append(time.perf_counter() - start)
+
+            # cache sudah terisi oleh putaran cold terakhir
+            warm = [_measure(lambda: build(*filters), False)[1] for _ in range(repeat)]
+
+            _record(results, rows, "dashboard", name, seconds, peaks, filters=mix,
+                    warm_seconds=min(warm), serialize_seconds=min(serialize), payload_bytes=len(payload))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = []
+    for rows in args.rows:
+        print(f"rows={rows:,}", flush=True)
+        if not args.skip_curate:
+            if rows <= args.raw_max:
+                bench_curate(results, rows, args.repeat, args.trace_memory)
+            else:
+                print(f"  curate dilewati (rows > --raw-max {args.raw_max:,})")
+        if not args.skip_dashboard:
+            bench_dashboard(results, rows, args.repeat, args.trace_memory)
+        results.append({"rows": rows, "group": "process", "name": "peak_rss", "peak_bytes": _peak_rss()})
+
+    report = {
+        "meta": {
+            "commit"    : _git_commit(),
+            "timestamp" : datetime.datetime.now().isoformat(timespec="seconds"),
+            "python"    : platform.python_version(),
+            "pandas"    : pd.__version__,
+            "numpy"     : np.__version__,
+            "platform"  : platform.platform(),
+            "repeat"    : args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=3)
+
+    table = pd.DataFrame([r for r in results if "seconds" in r])
+    if len(table):
+        table = table.fillna({"filters": ""})
+        print(table.pivot_table(index=["group", "name", "filters"], columns="rows", values="seconds").round(4).to_string())
+    print(f"hasil ditulis ke {args.out}")
+
+
+def _key(record):
+    return (record["rows"], record["group"], record["name"], record.get("filters", ""))
+
+
+# bandingkan dua file hasil; exit code 1 kalau ada yang lebih lambat dari threshold
+def compare(args):
+    with open(args.base) as f:
+        base = {_key(r): r for r in json.load(f)["results"] if "seconds" in r}
+    with open(args.head) as f:
+        head = {_key(r): r for r in json.load(f)["results"] if "seconds" in r}
+
+    rows = []
+    for key in sorted(set(base) & set(head), key=str):
+        ratio = head[key]["seconds"] / base[key]["seconds"] if base[key]["seconds"] else np.nan
+        rows.append(key + (base[key]["seconds"], head[key]["seconds"], ratio))
+
+    table = pd.DataFrame(rows, columns=["rows", "group", "name", "filters", "base_s", "head_s", "ratio"])
+    table["flag"] = np.where(table["ratio"] > args.threshold, "SLOWER",
+                             np.where(table["ratio"] < 1 / args.threshold, "faster", ""))
+    print(table.round(4).to_string(index=False))
+    return 1 if (table["flag"] == "SLOWER").any() else 0
+
+
+def main(argv=None):
+    parser      = argparse.ArgumentParser(description="benchmark curate.py dan dashboard")
+    commands    = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("run", help="jalankan benchmark")
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--raw-max", type=int, default=2_000_000,
+                   help="batas baris untuk benchmark curate (frame string mentah butuh banyak memory)")
+    p.add_argument("--trace-memory", action="store_true",
+                   help="catat peak alokasi per stage/panel dengan tracemalloc (lebih lambat)")
+    p.add_argument("--skip-curate", action="store_true")
+    p.add_argument("--skip-dashboard", action="store_true")
+
+    p = commands.add_parser("compare", help="bandingkan dua file hasil")
+    p.add_argument("base")
+    p.add_argument("head")
+    p.add_argument("--threshold", type=float, default=1.10)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from sketch import DEFAULT_PRECISION, DistinctTable, SketchTable, sketch_box_stats
+from store import concat_frames
+
+
+# dimensi filter dashboard, urutannya sama dengan argumen update_dashboard
+CUBE_DIMS       = ["control/mpa", "year", "trophic", "family"]
+
+# kolom yang dirata-rata di dashboard; disimpan sebagai sum + count
+# supaya bisa dijumlahkan lintas sel lalu dibagi di akhir
+CUBE_MEASURES   = ["biomass_(kg/ha)", "density_(n/ha)", "size_(cm)"]
+
+# kolom panel temporal (rata-rata per bulan / per site)
+TEMPORAL_MEASURES = ["biomass_(kg/ha)", "density_(n/ha)"]
+
+# resampling deret temporal: panjang periode dalam bulan
+RESAMPLE_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+# kolom boxplot; disimpan sebagai quantile sketch per sel (bisa digabung lintas sel)
+BOX_MEASURE     = "biomass_(kg/ha)"
+BOX_GROUP       = "control/mpa"
+
+# kolom distinct count -> tabel keberadaan di base (mode eksak)
+DISTINCT_COLUMNS = {"species": "species", "site_name": "site_names"}
+
+
+def _sums(df, keys):
+    grouped = df.groupby(keys, observed=True)
+    table   = grouped.size().rename("rows").to_frame()
+    for col in CUBE_MEASURES:
+        table[f"{col}_sum"] = grouped[col].sum()
+        table[f"{col}_n"]   = grouped[col].count()
+    return table.reset_index()
+
+
+# jumlahkan sum/count ke grain yang lebih kasar (measure aditif)
+def _rollup(base, keys):
+    cols = [c for c in base.columns if c == "rows" or c.endswith("_sum") or c.endswith("_n")]
+    return base.groupby(keys, observed=True)[cols].sum().reset_index()
+
+
+def _mean(table, col):
+    return table[f"{col}_sum"] / table[f"{col}_n"]
+
+
+def _keys(dims, out_keys):
+    return list(dims) + [k for k in out_keys if k not in dims]
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# nomor bulan berurutan (year * 12 + month - 1), dipakai sebagai sumbu slider rentang waktu
+def month_number(year, month):
+    return np.asarray(year, dtype=np.int64) * 12 + np.asarray(month, dtype=np.int64) - 1
+
+
+def _additive(table):
+    return [c for c in table.columns if not (c == "rows" or c.endswith("_sum") or c.endswith("_n"))]
+
+
+# tabel dasar cube dari baris data: sum/count per sel, dan sketch biomass per sel grain
+# terkecil (boxplot kombinasi filter apa pun = gabungan sel). distinct count disimpan sebagai
+# tabel keberadaan (eksak) atau, kalau precision diisi, sketch HyperLogLog per sel yang sama
+def _base_tables(observe_fish, precision=None):
+    months  = _sums(observe_fish, CUBE_DIMS + ["month"])
+    base    = {
+        "cells"     : _rollup(months, CUBE_DIMS),
+        "months"    : months,
+        "sites"     : _sums(observe_fish, CUBE_DIMS + ["sea_site_id"]),
+    }
+
+    cell        = observe_fish.groupby(CUBE_DIMS, observed=True, sort=False).ngroup().to_numpy()
+    first       = np.unique(cell, return_index=True)[1]
+    box_cells   = observe_fish[CUBE_DIMS].iloc[first].reset_index(drop=True)
+    box_sketch  = SketchTable(observe_fish[BOX_MEASURE].to_numpy(), cell, len(first))
+
+    if precision is None:
+        distinct = None
+        for column, name in DISTINCT_COLUMNS.items():
+            base[name] = observe_fish[CUBE_DIMS + [column]].drop_duplicates()
+    else:
+        distinct = {column: DistinctTable(observe_fish[column], cell, len(first), precision)
+                    for column in DISTINCT_COLUMNS}
+    return base, box_cells, box_sketch, distinct
+
+
+# OLAP cube untuk semua kombinasi filter (control/mpa x year x trophic x family,
+# masing-masing termasuk 'all'). dibangun sekali setelah data dimuat, callback tinggal lookup.
+# tabel dasar disimpan di grain terkecil (sum/count per dimensi), lalu tiap grouping set
+# (2^4 = 16 subset dimensi yang difilter) di-rollup sekali dan dipecah per kombinasi nilai.
+# distinct count (species, site) tidak aditif, jadi dihitung dari tabel keberadaan
+# (dims + species / site_name) yang jauh lebih kecil dari data mentah.
+# approximate=True: distinct count dari union sketch HyperLogLog per sel (lihat
+# sketch.DistinctTable, galat relatif ~sketch.distinct_error(precision)) tanpa tabel keberadaan
+class FilterCube:
+    def __init__(self, observe_fish, approximate=False, precision=DEFAULT_PRECISION):
+        self.precision = precision if approximate else None
+        self._build(*_base_tables(observe_fish, self.precision))
+
+    @property
+    def approximate(self):
+        return self.precision is not None
+
+    def _build(self, base, box_cells, box_sketch, distinct):
+        self.base       = base
+        self.box_cells  = box_cells
+        self.box_sketch = box_sketch
+        self.distinct   = distinct
+        self.entries    = {}
+        self.empty      = {}
+
+        for size in range(len(CUBE_DIMS) + 1):
+            for dims in combinations(CUBE_DIMS, size):
+                self._materialize(list(dims))
+
+    # cube untuk data lama + delta (baris baru) tanpa membaca ulang baris lama: tabel dasar
+    # delta digabung ke tabel dasar lama (sum/count dijumlahkan, tabel keberadaan disatukan,
+    # sketch per sel dijumlahkan), lalu grouping set di-materialize ulang dari tabel dasar
+    def extended(self, delta):
+        base, box_cells, box_sketch, distinct = _base_tables(delta, self.precision)
+
+        merged = {}
+        for name, table in self.base.items():
+            combined = concat_frames([table, base[name]])
+            if name in DISTINCT_COLUMNS.values():
+                merged[name] = combined.drop_duplicates()
+            else:
+                merged[name] = _rollup(combined, _additive(combined))
+
+        cells   = concat_frames([self.box_cells, box_cells])
+        group   = cells.groupby(CUBE_DIMS, observed=True, sort=False).ngroup().to_numpy()
+        first   = np.unique(group, return_index=True)[1]
+        old     = group[:len(self.box_cells)]
+        new     = group[len(self.box_cells):]
+        sketch  = SketchTable.combined(self.box_sketch, old, box_sketch, new, len(first))
+        if distinct is not None:
+            distinct = {column: DistinctTable.combined(self.distinct[column], old, distinct[column], new, len(first))
+                        for column in DISTINCT_COLUMNS}
+
+        cube            = FilterCube.__new__(FilterCube)
+        cube.precision  = self.precision
+        cube._build(merged, cells.iloc[first].reset_index(drop=True), sketch, distinct)
+        return cube
+
+    # distinct count kolom per grup keys (urutan sama dengan groupby(keys) yang diurutkan):
+    # dari tabel keberadaan, atau union sketch sel per grup dibulatkan ke bilangan bulat
+    def _distinct_counts(self, column, keys):
+        if self.distinct is None:
+            presence = self.base[DISTINCT_COLUMNS[column]]
+            if not keys:
+                return np.array([presence[column].nunique()])
+            return presence.groupby(keys, observed=True)[column].nunique().to_numpy()
+
+        if len(self.box_cells) == 0:
+            return np.zeros(0 if keys else 1, dtype=np.int64)
+        if keys:
+            groups = self.box_cells.groupby(keys, observed=True).ngroup().to_numpy()
+        else:
+            groups = np.zeros(len(self.box_cells), dtype=np.int64)
+        n = int(groups.max()) + 1
+        return self.distinct[column].union_counts(groups, n).round().astype(np.int64)
+
+    def _tables(self, dims):
+        base = self.base
+
+        trophic_keys    = _keys(dims, ["trophic"])
+        trophic         = _rollup(base["cells"], trophic_keys)[trophic_keys]
+        trophic["species"] = self._distinct_counts("species", trophic_keys)
+
+        temporal = _rollup(base["months"], _keys(dims, ["year", "month"]))
+        for col in TEMPORAL_MEASURES:
+            temporal[col] = _mean(temporal, col)
+
+        sites = _rollup(base["sites"], _keys(dims, ["sea_site_id"]))
+        for col in TEMPORAL_MEASURES:
+            sites[col] = _mean(sites, col)
+
+        summary_keys    = _keys(dims, ["family", "trophic", "control/mpa"])
+        summary         = _rollup(base["cells"], summary_keys)
+        summary["species"] = self._distinct_counts("species", summary_keys)
+        for col in CUBE_MEASURES:
+            summary[col] = _mean(summary, col)
+
+        return {
+            "trophic"   : (trophic, ["trophic", "species"]),
+            "temporal"  : (temporal, ["year", "month"] + TEMPORAL_MEASURES),
+            "monthly"   : (temporal, ["year", "month"] + [f"{col}_{part}" for col in TEMPORAL_MEASURES for part in ("sum", "n")]),
+            "sites"     : (sites, ["sea_site_id", "biomass_(kg/ha)", "density_(n/ha)"]),
+            "summary"   : (summary, ["family", "trophic", "control/mpa", "species"] + CUBE_MEASURES),
+        }
+
+    def _kpis(self, dims):
+        base = self.base
+        if not dims:
+            cells = base["cells"][["rows", "biomass_(kg/ha)_sum", "biomass_(kg/ha)_n"]].sum().to_frame().T
+        else:
+            cells = _rollup(base["cells"], dims)
+        for column in DISTINCT_COLUMNS:
+            cells[column] = self._distinct_counts(column, dims)
+        return cells
+
+    def _entry(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {}
+        return entry
+
+    def _key(self, dims, values):
+        values = dict(zip(dims, values))
+        return tuple(_scalar(values[dim]) if dim in values else 'all' for dim in CUBE_DIMS)
+
+    def _materialize(self, dims):
+        for row in self._kpis(dims).to_dict("records"):
+            key     = self._key(dims, [row[dim] for dim in dims])
+            count   = row["biomass_(kg/ha)_n"]
+            self._entry(key)["kpis"] = {
+                "total_obs"         : int(row["rows"]),
+                "unique_species"    : int(row["species"]),
+                "avg_biomass"       : row["biomass_(kg/ha)_sum"] / count if count else np.nan,
+                "total_sites"       : int(row["site_name"]),
+            }
+
+        for name, (table, columns) in self._tables(dims).items():
+            if not dims:
+                self.empty[name] = table[columns].iloc[:0].reset_index(drop=True)
+                self._entry(self._key(dims, []))[name] = table[columns].reset_index(drop=True)
+                continue
+
+            # urutkan per kombinasi sekali, lalu tiap kombinasi cukup slice (view, tanpa take/copy)
+            group   = table.groupby(dims, observed=True, sort=False).ngroup().to_numpy()
+            order   = np.argsort(group, kind="stable")
+            ordered = table.iloc[order].reset_index(drop=True)
+            bounds  = np.concatenate([[0], np.cumsum(np.bincount(group))])
+            parts   = ordered[columns]
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                values = [ordered[dim].iat[start] for dim in dims]
+                self._entry(self._key(dims, values))[name] = parts.iloc[start:stop]
+
+    # statistik boxplot biomass per control/mpa untuk satu kombinasi filter, dari sketch sel
+    # (tidak membaca baris data, waktunya tetap walaupun data bertambah)
+    def box_stats(self, mpa_control, year, trophic, family, max_outliers=100):
+        cells   = self.box_cells
+        mask    = np.ones(len(cells), dtype=bool)
+        for dim, value in zip(CUBE_DIMS, (mpa_control, year, trophic, family)):
+            if value != 'all':
+                mask &= (cells[dim] == value).to_numpy()
+
+        boxes   = {}
+        groups  = cells[BOX_GROUP]
+        for group in groups.cat.categories if hasattr(groups, "cat") else pd.unique(groups):
+            rows = mask & (groups == group).to_numpy()
+            if rows.any():
+                boxes[group] = sketch_box_stats(self.box_sketch.merged(rows), max_outliers)
+        return boxes
+
+    # deret temporal satu kombinasi filter dari rollup bulanan (sum + count per bulan):
+    # bulan di luar [start, stop] (nomor bulan, lihat month_number) dibuang, lalu sum/count
+    # dijumlahkan per periode resampling dan dibagi. year/month = bulan awal periode
+    def temporal(self, mpa_control, year, trophic, family, start=None, stop=None, freq="monthly"):
+        monthly = self.lookup(mpa_control, year, trophic, family)["monthly"]
+        months  = month_number(monthly["year"], monthly["month"])
+        keep    = np.ones(len(months), dtype=bool)
+        if start is not None:
+            keep &= months >= start
+        if stop is not None:
+            keep &= months <= stop
+
+        step                = RESAMPLE_MONTHS[freq]
+        periods, inverse    = np.unique(months[keep] // step * step, return_inverse=True)
+        series              = pd.DataFrame({"year": periods // 12, "month": periods % 12 + 1})
+        for col in TEMPORAL_MEASURES:
+            sums    = np.bincount(inverse, monthly[f"{col}_sum"].to_numpy()[keep], len(periods))
+            counts  = np.bincount(inverse, monthly[f"{col}_n"].to_numpy()[keep], len(periods))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                series[col] = sums / counts
+        return series
+
+    # hasil agregat untuk satu kombinasi filter; kombinasi tanpa data -> hasil kosong
+    def lookup(self, mpa_control, year, trophic, family):
+        entry = self.entries.get((mpa_control, year, trophic, family))
+        if entry is not None:
+            return entry
+
+        empty = {name: table.copy() for name, table in self.empty.items()}
+        empty["kpis"] = {"total_obs": 0, "unique_species": 0, "avg_biomass": np.nan, "total_sites": 0}
+        return empty
+
+
+# hasil lookup dengan distinct count eksak dari baris terpilih (rows = observasi kombinasi
+# filter yang sama), untuk seleksi kecil saat cube memakai sketch. tabel lain tidak diubah
+def exact_distinct(result, rows):
+    result  = dict(result)
+    kpis    = dict(result["kpis"])
+    kpis["unique_species"]  = int(rows["species"].nunique())
+    kpis["total_sites"]     = int(rows["site_name"].nunique())
+    result["kpis"]          = kpis
+
+    for name, keys in (("trophic", ["trophic"]), ("summary", ["family", "trophic", "control/mpa"])):
+        table   = result[name].copy()
+        counts  = rows.groupby(keys, observed=True)["species"].nunique()
+        table["species"] = counts.reindex(pd.MultiIndex.from_frame(table[keys]) if len(keys) > 1 else table[keys[0]]).to_numpy()
+        result[name] = table
+    return result
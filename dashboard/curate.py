@@ -1,11 +1,26 @@
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-import plotly.io as pio
-pio.renderers.default = "browser"
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import itertools
+import multiprocessing
+import os
 import re
+import sys
+import threading
+import time
+import warnings
+
+import openpyxl
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+import export
+import pipeline
+import shared
+import store
 
 
 # mengecilkan huruf header dan mengganti space jadi underscore
@@ -22,41 +37,90 @@ def measure_df_clean_header(df):
     return df
 
 
+# kolom measure yang angkanya pakai koma desimal
+measure_float_names = [
+    "depth_(m)",
+    "area_(m2)",
+    "size_(cm)",
+    "ind_weight_(kg)",
+    "density_(n/ha)",
+    "biomass_(kg/ha)"
+]
+
+measure_dtype_dict = {
+    'year'                  : int, 
+    'month'                 : int, 
+    'transect'              : int,
+    'size_(cm)'             : int,
+    'number_individu_(n)'   : int,
+}
+
+
 # mengubah tipe data beberapa kolom menjadi float dan int
+# (versi per-baris, dipakai sebagai referensi untuk measure_df_update_dtype_vec)
 def measure_df_update_dtype(df):
     # replace comma to dot
-    float_names = [
-        "depth_(m)",
-        "area_(m2)",
-        "size_(cm)",
-        "ind_weight_(kg)",
-        "density_(n/ha)",
-        "biomass_(kg/ha)"
-    ]
-
-    for name in float_names:
+    for name in measure_float_names:
         df[name] = df[name].apply(lambda x: float(x.replace(',', '.')))
-    
-    dtype_dict = {
-        'year'                  : int, 
-        'month'                 : int, 
-        'transect'              : int,
-        'size_(cm)'             : int,
-        'number_individu_(n)'   : int,
-    }
 
-    df = df.astype(dtype_dict)
+    df = df.astype(measure_dtype_dict)
+
+    return df
+
+
+# konversi string -> angka cukup sekali per nilai unik, lalu disebar lagi lewat codes.
+# kolom seperti year, month, transect, size isinya cuma puluhan nilai unik
+def _parse_unique(series, dtype, comma=False):
+    codes, uniques = pd.factorize(series)
+    if (codes < 0).any():
+        uniques, codes = series, np.arange(len(series))
+
+    uniques = pd.Series(uniques, dtype=object)
+    if comma:
+        uniques = uniques.str.replace(',', '.', regex=False)
+
+    # astype(float/int) di kolom string memanggil float()/int() di C,
+    # jadi hasil dan error-nya identik dengan versi lambda
+    values = uniques.astype(dtype).to_numpy()
+    return pd.Series(values.take(codes), index=series.index, name=series.name)
+
+
+# sama dengan measure_df_update_dtype tapi per kolom, tanpa lambda per baris
+def measure_df_update_dtype_vec(df):
+    for name in measure_float_names:
+        df[name] = _parse_unique(df[name], float, comma=True)
+
+    for name, dtype in measure_dtype_dict.items():
+        if df[name].dtype == object:
+            df[name] = _parse_unique(df[name], dtype)
+        else:
+            df[name] = df[name].astype(dtype)
 
     return df
 
 
-path_measure    = "dataset/mpa_fish.xlsx"
-measure_df      = pd.read_excel(path_measure, dtype=str).fillna("n/a")
+# urutan stage pipeline observe_fish
+measure_stages = [
+    measure_df_clean_header,
+    measure_df_update_dtype_vec,
+]
+
+
+def read_raw_excel(path):
+    return pd.read_excel(path, dtype=str).fillna("n/a")
+
 
-observe_fish    = (measure_df
-    .pipe(measure_df_clean_header)
-    .pipe(measure_df_update_dtype)
-)
+def _measure_pipeline(schema):
+    return measure_stages + ([measure_df_apply_schema] if schema else [])
+
+
+# bersihkan frame mentah (hasil read_excel dtype=str) jadi observe_fish
+def clean_measure_df(measure_df, schema=True):
+    return pipeline.run_pipe(measure_df, _measure_pipeline(schema), "observe_fish")
+
+
+def build_observe_fish(path, schema=True):
+    return pipeline.run_pipe(path, [read_raw_excel] + _measure_pipeline(schema), "observe_fish")
 
 
 # ------ - - --- - - -- - - -- - -- -- -- - - - --- - -  - - - -- - - -- - - - - - - --  -- - - - - - - - - - -
@@ -111,6 +175,62 @@ def latlon_to_decimal(latlon_str):
         return decimal_degrees
     
 
+# memo string koordinat -> desimal, dipakai lintas panggilan (site yang disurvey ulang
+# koordinatnya sama persis). dibatasi supaya tidak tumbuh tanpa batas
+_latlon_memo        = {}
+_latlon_memo_limit  = 200_000
+
+
+# versi batch latlon_to_decimal untuk satu Series sekaligus, return array float64.
+# string yang sama hanya diparse sekali, hasilnya sama dengan latlon_to_decimal
+# (None jadi NaN) termasuk ValueError untuk angka tunggal yang tidak valid
+def latlon_to_decimal_bulk(series):
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+
+    values  = np.full(len(uniques), np.nan)
+    known   = uniques.map(_latlon_memo)
+    hit     = known.notna() | uniques.isin(_latlon_memo.keys())
+    values[hit.to_numpy()] = known[hit].to_numpy(dtype=float)
+
+    todo    = uniques[~hit]
+    if len(todo):
+        text    = todo.str.lower()
+        numbers = text.str.findall(r"(\d+[,\.]*\d*)")
+        count   = numbers.str.len()
+        parsed  = pd.Series(np.nan, index=todo.index)
+
+        # satu angka: desimal biasa, diparse dari string utuh seperti aslinya
+        single  = count == 1
+        if single.any():
+            parsed[single] = text[single].astype(float)
+
+        # tiga angka: derajat, menit, detik + arah n/s/e/w
+        dms     = count == 3
+        if dms.any():
+            parts       = pd.DataFrame(numbers[dms].tolist(), index=numbers[dms].index)
+            direction   = text[dms].str.extract(r"([nsew])", expand=False)
+            if direction.isna().any():
+                missing = todo[dms][direction.isna()].iloc[0]
+                raise ValueError(f"koordinat tanpa arah n/s/e/w: {missing!r}")
+
+            degrees     = parts[0].astype(int)
+            minutes     = parts[1].astype(int)
+            seconds     = parts[2].str.replace(",", ".", regex=False).astype(float)
+            decimal     = degrees + (minutes / 60) + (seconds / 3600)
+            parsed[dms] = decimal.where(direction.isin(["n", "e"]), -decimal)
+
+        values[(~hit).to_numpy()] = parsed.to_numpy()
+
+        if len(_latlon_memo) + len(todo) > _latlon_memo_limit:
+            _latlon_memo.clear()
+        _latlon_memo.update(zip(todo, parsed))
+
+    result = values.take(codes)
+    result[codes < 0] = np.nan
+    return result
+
+
 # potong baris di excel, tapi kayaknya udah ga perlu dipake
 def site_df_onetime_truncate_columns(df):
     df = df.iloc[:, :-2]
@@ -131,13 +251,17 @@ def site_df_clean_header(df):
     return df
 
 
+# kolom site yang isinya n/a diganti np.nan
+site_na_columns = {
+    "dive_no"       : {"n/a": np.nan},
+    "slope_angle"   : {"n/a": np.nan},
+    "visibility"    : {"n/a": np.nan},
+}
+
+
 # replace string n/a jadi numeric np.nan
 def site_df_replace_na(df):
-    target_columns = {
-        "dive_no"       : {"n/a": np.nan},
-        "slope_angle"   : {"n/a": np.nan},
-        "visibility"    : {"n/a": np.nan},
-    }
+    target_columns = site_na_columns
 
     for col, pair in target_columns.items():
         pair    = target_columns[col]
@@ -175,6 +299,19 @@ def site_df_cleanse_coordinate(df):
     return df
 
 
+# sama dengan site_df_cleanse_coordinate, tapi lewat latlon_to_decimal_bulk
+def site_df_cleanse_coordinate_vec(df):
+    coords = [
+        "latitude",   
+        "longitude", 
+    ]
+
+    for name in coords:
+        df.loc[:, name] = latlon_to_decimal_bulk(df[name])
+
+    return df
+
+
 # konversi data type ke float dan integer 
 def site_df_update_dtype(df):
     # fix lat lon string
@@ -211,6 +348,11 @@ def site_df_handle_date(df):
 
     return df
 
+site_time_columns = [
+    "time"
+]
+
+
 # mengubah time string menjadi time object
 def site_df_handle_time(df):
     def convert(time_str):
@@ -223,30 +365,494 @@ def site_df_handle_time(df):
         else:
             return time_str
 
-    time_columns = [
-        "time"
-    ]
-
-    for col in time_columns:
+    for col in site_time_columns:
         df.loc[:, col] = df[col].apply(convert)
         # df.loc[:, col] = pd.to_datetime(df[col].apply(convert), errors="coerce", format="%H:%M").dt.time
 
     return df
 
 
-path_site       = "dataset/mpa_site.xlsx"
-site_df         = pd.read_excel(path_site, dtype=str).fillna("n/a")
+# versi vectorized site_df_replace_na.
+# versi aslinya memanggil str.replace("n/a", np.nan) yang selalu TypeError,
+# di sini cell yang isinya persis "n/a" yang diganti
+def site_df_replace_na_vec(df):
+    for col, pair in site_na_columns.items():
+        df[col] = df[col].replace(pair)
+
+    return df
+
+
+# versi vectorized site_df_handle_time: "8.5" -> "08:05", selain format jam.menit tidak diubah
+def site_df_handle_time_vec(df):
+    for col in site_time_columns:
+        text    = df[col]
+        mask    = text.str.count(r"\.") == 1
+        if not mask.any():
+            continue
+
+        # int() per bagian sama seperti convert(), string yang bukan angka tetap ValueError
+        needles = text[mask].str.split(".", n=1, expand=True)
+        hour    = needles[0].astype(int).astype(str).str.zfill(2)
+        minute  = needles[1].astype(int).astype(str).str.zfill(2)
+        df.loc[mask, col] = hour + ":" + minute
+
+    return df
+
+
+# ------ - - --- - - -- - - -- - -- -- -- - - - --- - -  - - - -- - - -- - - - - - - --  -- - - - - - - - - - -
+# schema dtype yang ringkas untuk hasil akhir curate.
+# teks yang nilainya sedikit jadi category (filter dashboard cukup bandingkan code int),
+# integer diperkecil, float32 untuk kolom yang presisinya cukup 1-4 desimal.
+# biomass dan density tetap float64 karena itu yang dirata-rata di dashboard
+observe_schema = {
+    "control/mpa"           : "category",
+    "year"                  : "int16",
+    "month"                 : "int8",
+    "transect"              : "int8",
+    "depth_(m)"             : "float32",
+    "area_(m2)"             : "float32",
+    "size_(cm)"             : "int16",
+    "ind_weight_(kg)"       : "float32",
+    "density_(n/ha)"        : "float64",
+    "biomass_(kg/ha)"       : "float64",
+    "number_individu_(n)"   : "int32",
+    "trophic"               : "category",
+    "family"                : "category",
+    "species"               : "category",
+    "site_name"             : "category",
+    "sea_site_id"           : "category",
+}
+
+site_schema = {
+    "rec_id"                : "Int32",
+    "mpa/control"           : "category",
+    "mpa"                   : "category",
+    "latitude"              : "float64",
+    "longitude"             : "float64",
+    "dive_no"               : "Int16",
+    "slope_angle"           : "float32",
+    "visibility"            : "float32",
+    "bleaching"             : "category",
+}
+
+
+# ubah dtype kolom sesuai schema. integer yang nilainya tidak muat di dtype
+# tujuan dianggap error, jangan sampai diam-diam overflow
+def apply_schema(df, schema):
+    for col, dtype in schema.items():
+        dtype = pd.api.types.pandas_dtype(dtype)
+
+        if pd.api.types.is_integer_dtype(dtype):
+            values  = pd.to_numeric(df[col])
+            info    = np.iinfo(dtype.numpy_dtype if hasattr(dtype, "numpy_dtype") else dtype)
+            if len(values.dropna()) and (values.min() < info.min or values.max() > info.max):
+                raise ValueError(f"kolom {col} tidak muat di {dtype}: {values.min()}..{values.max()}")
+            df[col] = values.astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
 
-site_fish = (site_df
-    .pipe(site_df_onetime_truncate_columns)
-    .pipe(site_df_clean_header)
-    .pipe(site_df_replace_comma)
-    # .pipe(site_df_replace_na)
-    .pipe(site_df_cleanse_coordinate)
-    .pipe(site_df_update_dtype)
-    .pipe(site_df_handle_date)
-    # .pipe(site_df_handle_time)
-)
+    return df
+
+
+def measure_df_apply_schema(df):
+    return apply_schema(df, observe_schema)
+
+
+# frame site masih berupa slice dari site_df_onetime_truncate_columns,
+# dicopy dulu (tabelnya kecil) supaya tidak SettingWithCopyWarning
+def site_df_apply_schema(df):
+    return apply_schema(df.copy(), site_schema)
+
+
+# bandingkan pemakaian memory sebelum dan sesudah schema, per kolom
+def memory_report(before, after):
+    report = pd.DataFrame({
+        "dtype_before"  : before.dtypes.astype(str),
+        "dtype_after"   : after.dtypes.astype(str),
+        "bytes_before"  : before.memory_usage(index=False, deep=True),
+        "bytes_after"   : after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = ["", "", report["bytes_before"].sum(), report["bytes_after"].sum()]
+    report["ratio"]     = (report["bytes_before"] / report["bytes_after"]).round(2)
+    return report
+
+
+# urutan stage pipeline site_fish
+site_stages = [
+    site_df_onetime_truncate_columns,
+    site_df_clean_header,
+    site_df_replace_comma,
+    # site_df_replace_na_vec,
+    site_df_cleanse_coordinate_vec,
+    site_df_update_dtype,
+    site_df_handle_date,
+    # site_df_handle_time_vec,
+]
+
+
+def _site_pipeline(schema):
+    return site_stages + ([site_df_apply_schema] if schema else [])
+
+
+# bersihkan frame mentah (hasil read_excel dtype=str) jadi site_fish
+def clean_site_df(site_df, schema=True):
+    return pipeline.run_pipe(site_df, _site_pipeline(schema), "site_fish")
+
+
+def build_site_fish(path, schema=True):
+    return pipeline.run_pipe(path, [read_raw_excel] + _site_pipeline(schema), "site_fish")
+
+
+# path workbook sumber: satu file, folder (semua *.xlsx di dalamnya), atau pola glob,
+# misalnya satu workbook per tim regional: MPA_FISH_SOURCES="dataset/regional/*_fish.xlsx"
+path_measure    = os.environ.get("MPA_FISH_SOURCES", "dataset/mpa_fish.xlsx")
+path_site       = os.environ.get("MPA_SITE_SOURCES", "dataset/mpa_site.xlsx")
+
+# survey baru (bulanan) cukup ditaruh sebagai workbook di folder ini, atau ditambahkan
+# barisnya ke workbook yang sudah ada; yang dibersihkan hanya file/baris barunya
+batch_measure   = "dataset/batches/fish"
+batch_site      = "dataset/batches/site"
+
+
+# jumlah proses untuk membaca + membersihkan beberapa workbook sekaligus (1 = tanpa pool).
+# default 1 supaya import app (server, worker gunicorn) tidak membuat pool sebesar jumlah cpu;
+# naikkan lewat env atau `python curate.py ingest --workers N`
+ingest_workers  = int(os.environ.get("MPA_INGEST_WORKERS", 1))
+
+
+# file, folder atau glob -> daftar workbook (urut nama, file lock excel ~$... dilewati)
+def expand_sources(path):
+    if os.path.isdir(path):
+        path = os.path.join(path, "*.xlsx")
+    elif not any(c in path for c in "*?["):
+        return [path]
+    return sorted(p for p in glob.glob(path) if not os.path.basename(p).startswith("~$"))
+
+
+# workbook utama + semua workbook batch (folder batch boleh belum ada)
+def source_paths(path, batch_dir):
+    return expand_sources(path) + expand_sources(os.path.join(batch_dir, "*.xlsx"))
+
+
+# kolom asal tiap baris: nama workbook, ditambah nama sheet kalau workbook berisi beberapa sheet data
+SOURCE_COLUMN   = "source_file"
+
+
+# jumlah baris per chunk saat membaca workbook; memory puncak ingest sebanding dengan chunk,
+# bukan dengan ukuran file
+chunk_rows      = int(os.environ.get("MPA_CHUNK_ROWS", 50_000))
+
+
+# nilai sel dikonversi sama persis dengan reader openpyxl di pd.read_excel
+def _cell_value(cell):
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+# baris sheet satu per satu (sel kosong di ujung dibuang); baris kosong hanya
+# dikeluarkan kalau masih ada baris berisi sesudahnya, seperti read_excel
+def _sheet_rows(sheet):
+    sheet.reset_dimensions()
+    blank = 0
+    for row in sheet.rows:
+        values = [_cell_value(cell) for cell in row]
+        while values and values[-1] == "":
+            values.pop()
+        if not values:
+            blank += 1
+            continue
+        yield from [[]] * blank
+        blank = 0
+        yield values
+
+
+# chunk baris -> frame mentah lewat parser yang sama dengan read_excel(dtype=str).
+# lebar kolom ditetapkan dari chunk pertama supaya semua chunk punya kolom yang sama
+def _raw_chunk(header, width, rows, label):
+    rows    = [row + [""] * (width - len(row)) for row in [header] + rows]
+    df      = TextParser(rows, header=0, dtype=str, skip_blank_lines=False).read()
+    return df.fillna("n/a").assign(**{SOURCE_COLUMN: label})
+
+
+# baca workbook bertahap (openpyxl read-only), yield frame mentah per chunk_rows baris + kolom asal.
+# semua sheet berisi data dibaca; sheet yang header-nya beda dengan sheet pertama
+# (catatan, pivot, ...) dilewati.
+# lebar frame = header atau baris terlebar di chunk pertama (sama dengan read_excel). baris yang
+# lebih lebar di chunk berikutnya ditolak (ValueError): chunk sebelumnya sudah keluar dan tidak
+# bisa dilebarkan lagi, sedangkan memotongnya diam-diam menggeser kolom hasil stage site
+def iter_raw_workbook(path, chunk_rows=chunk_rows):
+    name = os.path.basename(path)
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        # cukup header + satu baris untuk tahu sheet mana yang berisi data
+        sheets = []
+        for sheet in book.worksheets:
+            rows    = _sheet_rows(sheet)
+            header  = next(rows, None)
+            first   = next(rows, None)
+            if header is None or first is None:
+                continue
+            if sheets and header != sheets[0][1]:
+                warnings.warn(f"{name}: sheet {sheet.title!r} dilewati, header beda dengan sheet pertama")
+                continue
+            sheets.append((sheet.title, header, itertools.chain([first], rows)))
+
+        for title, header, rows in sheets:
+            label   = name if len(sheets) == 1 else f"{name}:{title}"
+            chunk   = list(itertools.islice(rows, chunk_rows))
+            width   = max(len(header), max(map(len, chunk)))
+            offset  = 0
+            while chunk:
+                wide = max(map(len, chunk))
+                if wide > width:
+                    row = offset + next(i for i, r in enumerate(chunk) if len(r) > width) + 1
+                    raise ValueError(f"{label}: baris data ke-{row} berisi {wide} kolom, lebih lebar dari "
+                                     f"{width} kolom (header / {chunk_rows} baris pertama); hapus isi sel di "
+                                     f"luar tabel atau baca dengan MPA_CHUNK_ROWS lebih besar")
+                offset  += len(chunk)
+                raw     = _raw_chunk(header, width, chunk, label)
+                chunk   = None
+                yield raw
+                raw     = None
+                chunk   = list(itertools.islice(rows, chunk_rows))
+    finally:
+        book.close()
+
+
+# kolom asal dilepas dulu (stage site memotong kolom menurut posisi), lalu dipasang lagi
+def _clean_with_source(clean, raw):
+    source              = raw.pop(SOURCE_COLUMN).to_numpy()
+    df                  = clean(raw)
+    df[SOURCE_COLUMN]   = pd.Categorical(source)
+    return df
+
+
+def clean_measure_workbook(raw):
+    return _clean_with_source(clean_measure_df, raw)
+
+
+def clean_site_workbook(raw):
+    return _clean_with_source(clean_site_df, raw)
+
+
+# baca + bersihkan semua workbook sumber (file/folder/glob + batch) per chunk seperti ingest,
+# tanpa lewat store; dipakai subcommand memory dan trace supaya melaporkan data yang sama.
+# trace stage per chunk digabung per pipeline (pipeline.record), tanpa stage baca workbook
+def build_from_sources(paths, clean_df, schema=True):
+    def clean(raw):
+        return clean_df(raw, schema=schema)
+
+    with pipeline.collect() as traces:
+        frames = [_clean_with_source(clean, raw) for path in paths for raw in iter_raw_workbook(path)]
+    pipeline.record(traces)
+    return store.concat_frames(frames)
+
+
+# loader data observe_fish & site_fish. import curate tidak lagi membaca file apa pun,
+# data dibangun saat pertama kali diakses lalu disimpan di memory.
+# hasil curate disimpan di store bertahap (part parquet per file/tambahan baris, lihat
+# store.sync_parts), jadi hanya file atau baris baru yang dibersihkan ulang.
+# kalau shared_dir diisi (folder hasil shared.publish, lihat serve.py), data tidak dibangun
+# tapi dibuka lewat memory map, dipakai bersama oleh semua worker server
+class CurateData:
+    def __init__(self, path_measure, path_site, shared_dir=None,
+                 batch_measure=batch_measure, batch_site=batch_site, workers=ingest_workers,
+                 cache_dir=store.CACHE_DIR):
+        self.path_measure   = path_measure
+        self.path_site      = path_site
+        self.batch_measure  = batch_measure
+        self.batch_site     = batch_site
+        self.shared_dir     = shared_dir
+        self.workers        = workers
+        self.cache_dir      = cache_dir
+        self.version        = 0
+        self.last_ingest    = None
+        self._frames        = None
+        self._delta         = None
+        self._lock          = threading.Lock()
+        self._ingest_lock   = threading.Lock()
+        self._thread        = None
+        self._watcher       = None
+        self._builders      = {}
+        self._derived       = {}
+        self._derived_locks = {}
+
+    def measure_paths(self):
+        return source_paths(self.path_measure, self.batch_measure)
+
+    def site_paths(self):
+        return source_paths(self.path_site, self.batch_site)
+
+    # samakan store dengan file sumber; frames = data di memory saat ini (part lama tidak dibaca ulang).
+    # workbook yang perlu dibersihkan dibagi ke process pool (spawn, aman dipanggil dari
+    # server yang sudah punya thread); proses worker baru dibuat kalau memang ada workbook baru
+    def _sync(self, frames=None):
+        version = store.pipeline_version(sys.modules[__name__])
+        current = frames or (None, None)
+        with self._executor() as executor:
+            observe_fish, appended_measure, changed_measure = store.sync_parts(
+                "observe_fish", self.measure_paths(), version, iter_raw_workbook, clean_measure_workbook,
+                current[0], cache_dir=self.cache_dir, executor=executor)
+            site_fish, appended_site, changed_site = store.sync_parts(
+                "site_fish", self.site_paths(), version, iter_raw_workbook, clean_site_workbook,
+                current[1], cache_dir=self.cache_dir, executor=executor)
+
+        self.last_ingest = {"observe_fish": appended_measure, "site_fish": appended_site}
+        return (observe_fish, site_fish), changed_measure or changed_site
+
+    def _executor(self):
+        if self.workers <= 1:
+            return contextlib.nullcontext()
+        return concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _build(self):
+        if self.shared_dir:
+            frames = shared.attach(self.shared_dir)
+            return frames["observe_fish"], frames["site_fish"]
+        return self._sync()[0]
+
+    # bangun data kalau belum ada; thread lain yang ikut memanggil akan menunggu
+    def load(self):
+        frames = self._frames
+        if frames is None:
+            with self._lock:
+                if self._frames is None:
+                    self._frames    = self._build()
+                    self.version    += 1
+                frames = self._frames
+        return frames
+
+    # pakai frame yang sudah jadi (misalnya data sintetis untuk benchmark)
+    def replace(self, observe_fish, site_fish):
+        with self._lock:
+            self._frames    = (observe_fish, site_fish)
+            self.version    += 1
+        return self._frames
+
+    # baca ulang dari sumber, version naik supaya cache turunan tahu datanya berubah
+    def reload(self):
+        with self._ingest_lock:
+            frames = self._build()
+            with self._lock:
+                self._frames    = frames
+                self._delta     = None
+                self.version    += 1
+        return self._frames
+
+    # proses file/baris baru saja lalu tambahkan ke data di memory. return True kalau ada perubahan.
+    # kalau perubahannya hanya penambahan baris, objek turunan yang punya update()
+    # diperbarui dari baris baru saja (lihat register)
+    def ingest(self):
+        if self.shared_dir:
+            return False
+        old = self.load()
+        with self._ingest_lock:
+            old = self._frames
+            frames, changed = self._sync(old)
+            if not changed:
+                return False
+            appended = self.last_ingest
+            with self._lock:
+                self._frames    = frames
+                self.version    += 1
+                self._delta     = None
+                if None not in appended.values():
+                    self._delta = (self.version, len(old[0]), len(old[1]))
+        return True
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.ingest()
+            except Exception as exc:
+                warnings.warn(f"ingest gagal: {exc}")
+
+    # cek file sumber tiap interval detik di background thread (server yang jalan lama)
+    def watch(self, interval):
+        if self._watcher is None and not self.shared_dir:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="curate-ingest", daemon=True)
+            self._watcher.start()
+        return self._watcher
+
+    # daftarkan objek turunan (index, agregat, ...) yang dibangun dari
+    # build(observe_fish, site_fish), sekali per versi data.
+    # update(lama, delta_observe, delta_site, observe_fish, site_fish) opsional: dipakai setelah
+    # ingest yang hanya menambah baris, supaya objek tidak dibangun ulang dari seluruh data
+    def register(self, name, build, update=None):
+        self._builders[name] = (build, update)
+
+    def _derive(self, name, entry, frames, version):
+        build, update   = self._builders[name]
+        delta           = self._delta
+        if update is not None and entry is not None and delta is not None \
+                and delta[0] == version and entry[0] == version - 1:
+            observe_fish, site_fish = frames
+            return update(entry[1], observe_fish.iloc[delta[1]:], site_fish.iloc[delta[2]:], observe_fish, site_fish)
+        return build(*frames)
+
+    def get(self, name):
+        self.load()
+        with self._lock:
+            frames, version = self._frames, self.version
+            lock            = self._derived_locks.setdefault(name, threading.Lock())
+
+        entry = self._derived.get(name)
+        if entry is None or entry[0] != version:
+            with lock:
+                entry = self._derived.get(name)
+                if entry is None or entry[0] != version:
+                    entry = (version, self._derive(name, entry, frames, version))
+                    self._derived[name] = entry
+        return entry[1]
+
+    def _warm_up(self):
+        self.load()
+        for name in list(self._builders):
+            self.get(name)
+
+    # mulai load (dan bangun objek turunan) di background thread,
+    # misalnya saat server dash baru start
+    def warm_up(self):
+        if self._frames is None and self._thread is None:
+            self._thread = threading.Thread(target=self._warm_up, name="curate-warm-up", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def ready(self):
+        return self._frames is not None
+
+    @property
+    def observe_fish(self):
+        return self.load()[0]
+
+    @property
+    def site_fish(self):
+        return self.load()[1]
+
+
+# folder dataset bersama diisi oleh serve.py lewat env MPA_SHARED_DATA
+data = CurateData(path_measure, path_site, os.environ.get("MPA_SHARED_DATA"))
+
+
+# cache_key data saat ini (file sumber + versi kode curate, plus modul lain yang hasilnya
+# ikut disimpan), dipakai sebagai nama folder dataset bersama
+def data_key(*modules):
+    paths = source_paths(path_measure, batch_measure) + source_paths(path_site, batch_site)
+    return store.cache_key(paths, store.pipeline_version(sys.modules[__name__], *modules))
+
+
+# supaya `from curate import observe_fish, site_fish` yang lama tetap jalan (lazy)
+def __getattr__(name):
+    if name in ("observe_fish", "site_fish"):
+        return getattr(data, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def randomly_swap_rows(df, inplace=False):
@@ -275,8 +881,69 @@ def randomly_swap_rows(df, inplace=False):
     return df
 
 
+def main(argv=None):
+    parser      = argparse.ArgumentParser(description="bersihkan data survey MPA; tanpa subcommand -> tulis observe_fish.json dan site_fish.json")
+    commands    = parser.add_subparsers(dest="command")
+
+    commands.add_parser("memory", help="bandingkan memory sebelum/sesudah schema")
+    commands.add_parser("trace", help="bersihkan ulang semua workbook sumber dan tampilkan waktu/memory per stage")
+    p = commands.add_parser("ingest", help="proses workbook/baris baru saja ke store bertahap")
+    p.add_argument("--workers", type=int, default=None, help="proses paralel (default MPA_INGEST_WORKERS atau 1)")
+
+    p = commands.add_parser("export", help="ekspor observe_fish dan site_fish (ndjson atau parquet terpartisi) + manifest")
+    p.add_argument("--format", choices=["parquet", "ndjson"], default="parquet")
+    p.add_argument("--out", default="export", help="folder hasil (hanya ditimpa kalau kosong atau berisi ekspor sebelumnya)")
+    p.add_argument("--partition-by", nargs="*", default=None,
+                   help="kolom partisi parquet (default: year control/mpa untuk observe_fish, mpa/control untuk site_fish)")
+    p.add_argument("--compression", default=None,
+                   help=f"ndjson: {', '.join(export.NDJSON_COMPRESSION)}; parquet: {', '.join(export.PARQUET_COMPRESSION)} (default snappy)")
+    p.add_argument("--chunk-rows", type=int, default=100_000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "memory":
+        observe_fish    = build_from_sources(data.measure_paths(), clean_measure_df, schema=False)
+        site_fish       = build_from_sources(data.site_paths(), clean_site_df, schema=False)
+        print(memory_report(observe_fish, measure_df_apply_schema(observe_fish.copy())))
+        print(memory_report(site_fish, site_df_apply_schema(site_fish.copy())))
+
+    elif args.command == "trace":
+        pipeline.enable(deep_memory=True)
+        build_from_sources(data.measure_paths(), clean_measure_df)
+        build_from_sources(data.site_paths(), clean_site_df)
+        for trace in pipeline.last_traces().values():
+            print(f"{trace.name}: {trace.seconds:.3f}s")
+            print(trace.report().to_string())
+
+    elif args.command == "ingest":
+        if args.workers is not None:
+            data.workers = args.workers
+        observe_fish, site_fish = data.load()
+        for name, appended in data.last_ingest.items():
+            print(f"{name}: {'dibangun ulang' if appended is None else f'{appended} baris baru'}")
+        print(f"observe_fish: {len(observe_fish)} baris, site_fish: {len(site_fish)} baris")
+
+    elif args.command == "export":
+        allowed = export.NDJSON_COMPRESSION if args.format == "ndjson" else export.PARQUET_COMPRESSION
+        if args.compression is not None and args.compression not in allowed:
+            parser.error(f"kompresi {args.compression!r} tidak didukung untuk {args.format}")
+
+        observe_fish, site_fish = data.load()
+        try:
+            manifest = export.export({"observe_fish": observe_fish, "site_fish": site_fish}, args.out, args.format,
+                                     args.partition_by, args.chunk_rows, args.compression, source=data_key())
+        except ValueError as exc:
+            parser.error(str(exc))
+        for name, table in manifest["tables"].items():
+            print(f"{name}: {table['rows']} baris, {len(table['files'])} file")
+        print(f"manifest: {os.path.join(args.out, 'manifest.json')}")
+
+    else:
+        # randomly_swap_rows(observe_fish, inplace=True)
+        # randomly_swap_rows(site_fish, inplace=True)
+        data.observe_fish.to_json('observe_fish.json', orient='records', indent=3)
+        data.site_fish.to_json('site_fish.json', orient='records', indent=3)
+
+
 if __name__ == "__main__":
-    # randomly_swap_rows(observe_fish, inplace=True)
-    # randomly_swap_rows(site_fish, inplace=True)
-    observe_fish.to_json('observe_fish.json', orient='records', indent=3)
-    site_fish.to_json('site_fish.json', orient='records', indent=3)
\ No newline at end of file
+    main()
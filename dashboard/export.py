@@ -0,0 +1,228 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import store
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ekspor observe_fish / site_fish untuk konsumen lain (python curate.py export ...).
+# frame ditulis per chunk baris, jadi memory tambahan sebanding dengan chunk, bukan ukuran tabel:
+#
+#   ndjson  -> <out>/<tabel>.ndjson[.gz|.bz2|.xz], satu record json per baris
+#   parquet -> <out>/<tabel>/<kolom>=<nilai>/.../part-0.parquet (partisi gaya hive)
+#
+# <out>/manifest.json mencatat jumlah baris, ukuran dan sha256 tiap file, serta nama kolom
+# asli tiap folder partisi ("/" di nama kolom diganti "_", baca balik lewat read_parquet).
+# ekspor ditulis ke folder sementara di sebelah <out> lalu dipindah; <out> yang sudah ada hanya
+# ditimpa kalau kosong atau berisi ekspor sebelumnya (ada manifest.json ekspor)
+
+EXPORT_FORMAT       = 1
+
+NDJSON_COMPRESSION  = {"gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+PARQUET_COMPRESSION = ["snappy", "gzip", "zstd", "brotli", "lz4"]
+
+# kolom partisi default per tabel
+PARTITION_COLUMNS   = {
+    "observe_fish"  : ["year", "control/mpa"],
+    "site_fish"     : ["mpa/control"],
+}
+
+
+def _file_entry(out_dir, path, rows, partition=None):
+    entry = {
+        "path"      : os.path.relpath(path, out_dir),
+        "rows"      : int(rows),
+        "bytes"     : os.path.getsize(path),
+        "sha256"    : store.file_sha256(path),
+    }
+    if partition is not None:
+        entry["partition"] = partition
+    return entry
+
+
+# kolom float32 -> float64 dengan nilai desimal terpendek yang sama (9.338, bukan 9.3380002975),
+# supaya json berisi angka yang sama dengan sumber
+def _json_floats(chunk):
+    columns = chunk.select_dtypes("float32").columns
+    if len(columns) == 0:
+        return chunk
+    return chunk.assign(**{col: chunk[col].astype(str).astype(np.float64) for col in columns})
+
+
+# nilai yang tidak dikenal orjson: timestamp pandas -> teks iso, NaT / NA -> null
+def _json_default(value):
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"tidak bisa ditulis sebagai json: {type(value).__name__}")
+
+
+# satu chunk -> baris ndjson (bytes). orjson menulis float dengan representasi terpendek
+# (77.74, bukan 77.739999999999995); tanpa orjson dipakai to_json pandas dengan presisi
+# maksimum, nilainya tetap sama saat dibaca ulang walaupun teksnya lebih panjang
+def _ndjson_lines(chunk):
+    if orjson is None:
+        text = chunk.to_json(orient="records", lines=True, date_format="iso", double_precision=15)
+        return (text if text.endswith("\n") else text + "\n").encode("utf-8")
+    return b"".join(orjson.dumps(record, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+                    for record in chunk.to_dict("records"))
+
+
+# tulis frame sebagai ndjson, chunk_rows record sekaligus (kolom category jadi teks, tanggal iso)
+def write_ndjson(df, path, chunk_rows=100_000, compression=None):
+    opener = NDJSON_COMPRESSION[compression][0] if compression else open
+    with opener(path, "wb") as f:
+        for start in range(0, len(df), chunk_rows):
+            f.write(_ndjson_lines(_json_floats(df.iloc[start:start + chunk_rows])))
+
+
+def export_ndjson(name, df, out_dir, chunk_rows=100_000, compression=None):
+    suffix  = NDJSON_COMPRESSION[compression][1] if compression else ""
+    path    = os.path.join(out_dir, f"{name}.ndjson{suffix}")
+    write_ndjson(df, path, chunk_rows, compression)
+    return [_file_entry(out_dir, path, len(df))]
+
+
+# nama kolom di folder partisi: "/" tidak boleh ada di nama folder, diganti "_"
+def partition_name(column):
+    return column.replace("/", "_")
+
+
+# nama folder partisi, nilai di-escape (kosong -> __null__)
+def _partition_dir(columns, values):
+    parts = []
+    for column, value in zip(columns, values):
+        value = "__null__" if value != value or value is None else quote(str(value), safe="")
+        parts.append(f"{partition_name(column)}={value}")
+    return os.path.join(*parts)
+
+
+# tulis satu file parquet dari baris (dan kolom) terpilih, satu row group per chunk_rows baris.
+# schema diambil dari chunk pertama (tipe kolom object baru ketahuan dari isinya)
+def write_parquet(df, rows, path, columns=None, chunk_rows=100_000, compression="snappy"):
+    positions   = [df.columns.get_loc(c) for c in (df.columns if columns is None else columns)]
+    writer      = None
+    try:
+        for start in range(0, len(rows), chunk_rows):
+            chunk = df.iloc[rows[start:start + chunk_rows], positions]
+            if writer is None:
+                table   = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer  = pq.ParquetWriter(path, table.schema, compression=compression or "none")
+            else:
+                table   = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# kolom partisi tidak ikut ditulis di file (nilainya ada di nama folder dan manifest),
+# sama seperti partisi hive. pd.read_parquet / pyarrow.dataset bisa membaca folder tabel langsung,
+# tapi kolom partisi bernama folder (control_mpa); read_parquet di bawah memakai nama asli
+def export_parquet(name, df, out_dir, partition_by=(), chunk_rows=100_000, compression="snappy"):
+    partition_by    = [c for c in partition_by if c in df.columns]
+    columns         = [c for c in df.columns if c not in partition_by]
+    entries         = []
+    if not partition_by:
+        groups = [((), range(len(df)))]
+    else:
+        groups = df.groupby(partition_by, observed=True, dropna=False, sort=True).indices.items()
+
+    for values, rows in groups:
+        values  = values if isinstance(values, tuple) else (values,)
+        folder  = os.path.join(out_dir, name, _partition_dir(partition_by, values)) if partition_by else os.path.join(out_dir, name)
+        os.makedirs(folder, exist_ok=True)
+        path    = os.path.join(folder, "part-0.parquet")
+        write_parquet(df, rows, path, columns, chunk_rows, compression)
+        partition = {column: (None if value != value else value.item() if hasattr(value, "item") else value)
+                     for column, value in zip(partition_by, values)}
+        entries.append(_file_entry(out_dir, path, len(rows), partition))
+    return entries
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and "tables" in manifest and "export" in manifest else None
+
+
+# folder yang boleh ditimpa: belum ada, kosong, atau hasil ekspor sebelumnya
+def _check_out_dir(out_dir):
+    if not os.path.exists(out_dir):
+        return
+    if not os.path.isdir(out_dir):
+        raise ValueError(f"{out_dir} sudah ada dan bukan folder")
+    if os.listdir(out_dir) and _load_manifest(out_dir) is None:
+        raise ValueError(f"{out_dir} tidak kosong dan bukan folder ekspor (tidak ada manifest.json), tidak ditimpa")
+
+
+# ekspor semua frame (dict nama -> DataFrame) ke out_dir lalu tulis manifest.
+# semua file ditulis dulu ke folder sementara di sebelah out_dir, baru setelah selesai
+# menggantikan out_dir (ekspor lama tidak tercampur, dan tidak hilang kalau ekspor gagal)
+def export(frames, out_dir, fmt="parquet", partition_by=None, chunk_rows=100_000, compression=None, source=None):
+    out_dir = os.path.abspath(out_dir)
+    _check_out_dir(out_dir)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(out_dir)}-", dir=os.path.dirname(out_dir))
+    try:
+        tables = {}
+        for name, df in frames.items():
+            if fmt == "ndjson":
+                columns = []
+                files   = export_ndjson(name, df, staging, chunk_rows, compression)
+            else:
+                columns = PARTITION_COLUMNS.get(name, []) if partition_by is None else partition_by
+                columns = [c for c in columns if c in df.columns]
+                files   = export_parquet(name, df, staging, columns, chunk_rows, compression or "snappy")
+            tables[name] = {
+                "rows"          : int(len(df)),
+                "columns"       : {col: str(dtype) for col, dtype in df.dtypes.items()},
+                "partition_by"  : {partition_name(col): col for col in columns},
+                "files"         : files,
+            }
+
+        manifest = {"format": EXPORT_FORMAT, "export": fmt, "compression": compression, "source": source, "tables": tables}
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=3)
+
+        if os.path.exists(out_dir):
+            old = staging + ".old"
+            os.rename(out_dir, old)
+            os.rename(staging, out_dir)
+            shutil.rmtree(old)
+        else:
+            os.rename(staging, out_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+# baca balik satu tabel parquet hasil ekspor sebagai DataFrame, kolom partisi
+# dikembalikan ke nama aslinya (control_mpa -> control/mpa) sesuai manifest
+def read_parquet(out_dir, name):
+    manifest    = _load_manifest(out_dir)
+    if manifest is None or name not in manifest["tables"]:
+        raise ValueError(f"tabel {name!r} tidak ada di ekspor {out_dir}")
+    renames     = manifest["tables"][name].get("partition_by", {})
+    dataset     = ds.dataset(os.path.join(out_dir, name), format="parquet", partitioning="hive")
+    return dataset.to_table().to_pandas().rename(columns=renames)
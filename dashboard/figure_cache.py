@@ -0,0 +1,79 @@
+import json
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+
+# cache hasil render dashboard (figure + data tabel) dalam bentuk JSON,
+# key = tuple filter. LRU dengan batas total byte, bukan jumlah entry,
+# karena ukuran figure per kombinasi filter bisa beda jauh.
+# semua entry dibuang begitu versi data berubah (data di-reload)
+class FigureCache:
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes  = max_bytes
+        self.bytes      = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.evictions  = 0
+        self.version    = None
+        self._entries   = OrderedDict()
+        self._lock      = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.bytes      = 0
+            self.version    = version
+
+    def get(self, key, version):
+        payload = self.get_payload(key, version)
+        return None if payload is None else json.loads(payload)
+
+    def put(self, key, version, value):
+        self.put_payload(key, version, to_json_plotly(value).encode("utf-8"))
+
+    # entry mentah (misalnya bytes response yang sudah jadi); size = byte yang dihitung ke batas cache
+    def get_payload(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[0]
+
+    def put_payload(self, key, version, payload, size=None):
+        size = len(payload) if size is None else size
+
+        with self._lock:
+            # hasil render dari data versi lama (reload terjadi saat render) tidak disimpan
+            if version != self.version or size > self.max_bytes:
+                return
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+            self._entries[key] = (payload, size)
+            self.bytes += size
+
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes      -= evicted
+                self.evictions  += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries"   : len(self._entries),
+                "bytes"     : self.bytes,
+                "max_bytes" : self.max_bytes,
+                "hits"      : self.hits,
+                "misses"    : self.misses,
+                "evictions" : self.evictions,
+                "hit_rate"  : self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,151 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# kolom yang bisa difilter dari dropdown dashboard
+FILTER_COLUMNS = ["control/mpa", "year", "trophic", "family"]
+
+
+# dtype terkecil untuk code 0..n_values-1 plus -1 (NaN); factorize selalu memberi int64,
+# padahal kolom seperti year hanya punya beberapa nilai
+def compact_codes(codes, n_values):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values <= np.iinfo(dtype).max:
+            return codes.astype(dtype, copy=False)
+    return codes.astype(np.int64, copy=False)
+
+
+# index terbalik: untuk tiap kolom filter, nilai -> posisi baris (terurut naik).
+# filter tidak perlu copy + scan seluruh tabel, cukup ambil posting list terkecil
+# lalu cek kolom lain hanya di posisi itu, jadi biayanya ikut ukuran hasil filter
+class FilterIndex:
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.n_rows     = len(df)
+        self.codes      = {}
+        self.lookup     = {}
+        self.postings   = {}
+
+        pos_dtype = np.int32 if self.n_rows < np.iinfo(np.int32).max else np.int64
+
+        for col in columns:
+            column = df[col]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes   = column.cat.codes.to_numpy()
+                values  = column.cat.categories.tolist()
+            else:
+                codes, values   = pd.factorize(column, sort=True)
+                values          = values.tolist()
+
+            # argsort stable -> posisi per nilai tetap terurut naik
+            order   = np.argsort(codes, kind="stable").astype(pos_dtype)
+            counts  = np.bincount(codes[codes >= 0], minlength=len(values))
+            start   = np.count_nonzero(codes < 0)
+            bounds  = start + np.concatenate([[0], np.cumsum(counts)])
+
+            self.codes[col]     = compact_codes(codes, len(values))
+            self.lookup[col]    = {value: code for code, value in enumerate(values)}
+            self.postings[col]  = [order[bounds[i]:bounds[i + 1]] for i in range(len(values))]
+
+    # index untuk df = frame lama + baris baru di akhir, tanpa mengurutkan ulang baris lama:
+    # posisi baris baru disambung ke posting list nilai yang bersangkutan. kategori baru
+    # (misalnya family baru) mendapat code baru; kalau urutan kategori lama berubah, bangun ulang
+    def extended(self, df):
+        start   = self.n_rows
+        index   = FilterIndex.__new__(FilterIndex)
+        index.n_rows, index.codes, index.lookup, index.postings = len(df), {}, {}, {}
+        pos_dtype = np.int32 if index.n_rows < np.iinfo(np.int32).max else np.int64
+
+        for col, lookup in self.lookup.items():
+            column = df[col]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                values = column.cat.categories.tolist()
+                if values[:len(lookup)] != list(lookup):
+                    return FilterIndex(df, list(self.lookup))
+                lookup  = {value: code for code, value in enumerate(values)}
+                codes   = column.cat.codes.to_numpy()[start:]
+            else:
+                new, uniques    = pd.factorize(column.iloc[start:])
+                lookup          = dict(lookup)
+                for value in uniques.tolist():
+                    lookup.setdefault(value, len(lookup))
+                # code -1 (NaN) jatuh ke elemen terakhir mapping
+                mapping = np.array([lookup[v] for v in uniques.tolist()] + [-1], dtype=np.int64)
+                codes   = mapping[new]
+
+            postings    = list(self.postings[col]) + [np.empty(0, dtype=pos_dtype)] * (len(lookup) - len(self.postings[col]))
+            order       = np.argsort(codes, kind="stable")
+            counts      = np.bincount(codes[codes >= 0], minlength=len(lookup))
+            bounds      = np.count_nonzero(codes < 0) + np.concatenate([[0], np.cumsum(counts)])
+            for code in np.nonzero(counts)[0]:
+                added           = (order[bounds[code]:bounds[code + 1]] + start).astype(pos_dtype)
+                postings[code]  = np.concatenate([postings[code].astype(pos_dtype), added])
+
+            index.codes[col]    = compact_codes(np.concatenate([self.codes[col], codes]), len(lookup))
+            index.lookup[col]   = lookup
+            index.postings[col] = postings
+        return index
+
+    # tulis index ke folder (.npy per kolom) supaya bisa dibuka worker lain lewat memory map
+    # (lihat shared.publish); posting list satu kolom disambung jadi satu array + batasnya
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        for i, (col, postings) in enumerate(self.postings.items()):
+            sizes   = np.array([len(p) for p in postings], dtype=np.int64)
+            bounds  = np.concatenate([[0], np.cumsum(sizes)])
+            np.save(os.path.join(folder, f"{i}.codes.npy"), self.codes[col])
+            np.save(os.path.join(folder, f"{i}.postings.npy"), np.concatenate(postings) if postings else np.empty(0, dtype=np.int32))
+            np.save(os.path.join(folder, f"{i}.bounds.npy"), bounds)
+            pd.to_pickle(list(self.lookup[col]), os.path.join(folder, f"{i}.values.pkl"))
+
+        with open(os.path.join(folder, "index.json"), "w") as f:
+            json.dump({"rows": self.n_rows, "columns": list(self.postings)}, f, indent=3)
+
+    # buka index hasil save tanpa menyalin codes/posting list; mmap_mode "r" = read-only
+    @classmethod
+    def attach(cls, folder, mmap_mode="r"):
+        with open(os.path.join(folder, "index.json")) as f:
+            meta = json.load(f)
+
+        index = cls.__new__(cls)
+        index.n_rows, index.codes, index.lookup, index.postings = meta["rows"], {}, {}, {}
+        for i, col in enumerate(meta["columns"]):
+            order   = np.load(os.path.join(folder, f"{i}.postings.npy"), mmap_mode=mmap_mode)
+            bounds  = np.load(os.path.join(folder, f"{i}.bounds.npy"))
+            values  = pd.read_pickle(os.path.join(folder, f"{i}.values.pkl"))
+            index.codes[col]    = np.load(os.path.join(folder, f"{i}.codes.npy"), mmap_mode=mmap_mode)
+            index.lookup[col]   = {value: code for code, value in enumerate(values)}
+            index.postings[col] = [order[bounds[j]:bounds[j + 1]] for j in range(len(values))]
+        return index
+
+    # posisi baris yang lolos semua filter; None artinya semua baris ('all' semua)
+    def positions(self, filters):
+        active = {col: value for col, value in filters.items() if value != 'all'}
+        if not active:
+            return None
+
+        postings = {}
+        for col, value in active.items():
+            code = self.lookup[col].get(value)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            postings[col] = code
+
+        # mulai dari posting list terpendek, kolom lain dicek lewat code di posisi tsb
+        first   = min(postings, key=lambda col: len(self.postings[col][postings[col]]))
+        result  = self.postings[first][postings[first]]
+        for col, code in postings.items():
+            if col != first and len(result):
+                result = result[self.codes[col][result] == code]
+
+        return result
+
+    # subset frame sesuai filter. kalau tidak ada filter, frame asli dikembalikan
+    # tanpa copy, jadi hasilnya jangan diubah in-place
+    def select(self, df, filters):
+        positions = self.positions(filters)
+        if positions is None:
+            return df
+        return df.take(positions)
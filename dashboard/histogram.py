@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# histogram dihitung di server: yang dikirim ke browser hanya jumlah per bin per grup
+# (O(bin x grup)), bukan seluruh nilai mentah seperti px.histogram
+
+
+# lebar bin "rapi" (1, 2, 5 x 10^k) seperti autobin plotly untuk nbins yang diminta.
+# data bilangan bulat dengan lebar bin bulat digeser setengah, supaya nilai tidak jatuh tepat di tepi bin
+def nice_edges(vmin, vmax, nbins=20, integer=False):
+    span = vmax - vmin
+    if not span > 0:
+        step = 1.0
+    else:
+        rough   = span / nbins
+        base    = 10 ** math.floor(math.log10(rough))
+        step    = next(m * base for m in (1, 2, 5, 10) if m * base >= rough * (1 - 1e-9))
+
+    start = math.floor(vmin / step) * step
+    if integer and float(step).is_integer():
+        start -= 0.5
+    count = max(1, math.ceil((vmax - start) / step + 1e-9))
+    if start + count * step <= vmax:
+        count += 1
+    return start + step * np.arange(count + 1)
+
+
+# jumlah baris per (grup, bin); grup diurutkan menurut kemunculan pertama di data,
+# sama dengan urutan warna px.histogram(color=...)
+def binned_counts(df, value, by, nbins=20):
+    values  = df[value].to_numpy()
+    finite  = np.isfinite(values.astype("float64"))
+    values  = values[finite]
+    empty   = pd.DataFrame({by: [], value: [], "count": []})
+    if len(values) == 0:
+        return empty, 1.0
+
+    edges   = nice_edges(values.min(), values.max(), nbins, integer=np.issubdtype(values.dtype, np.integer))
+    step    = edges[1] - edges[0]
+    bins    = np.clip(((values - edges[0]) // step).astype(np.int64), 0, len(edges) - 2)
+
+    # factorize langsung dari Series (kategori -> pakai kode, tanpa hashing string); grup NaN dibuang
+    codes, groups   = pd.factorize(df[by][finite])
+    keep            = codes >= 0
+    codes, bins     = codes[keep], bins[keep]
+    nb              = len(edges) - 1
+    counts          = np.bincount(codes * nb + bins, minlength=len(groups) * nb).reshape(len(groups), nb)
+
+    group_idx, bin_idx = np.nonzero(counts)
+    table = pd.DataFrame({
+        by      : np.asarray(groups)[group_idx],
+        value   : edges[bin_idx] + step / 2,
+        "count" : counts[group_idx, bin_idx],
+    })
+    return table, step
@@ -0,0 +1,214 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+
+# instrumentasi ringan untuk server dash, tanpa dependency tambahan:
+# - timed("fase") mencatat durasi ke histogram mpa_phase_seconds, dan kalau sedang
+#   di dalam request juga ke header Server-Timing response tersebut
+# - install(server) memasang hook request (jumlah request, latency, callback in-flight)
+#   dan endpoint /metrics dalam format teks Prometheus
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(labelnames, key)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self._values    = {}
+        self._lock      = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                                for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+                    break
+            counts[1] += value
+            counts[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = {key: (list(c[0]), c[1], c[2]) for key, c in self._values.items()}
+
+        lines = self.header()
+        for key, (buckets, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# kumpulan metric + collector (fungsi yang dipanggil saat scrape, untuk nilai
+# yang sudah dihitung di tempat lain seperti statistik figure cache)
+class Registry:
+    def __init__(self):
+        self.metrics    = []
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help, labelnames, buckets))
+
+    # collect() -> iterable Gauge/Counter yang diisi saat itu juga
+    def collector(self, collect):
+        self.collectors.append(collect)
+        return collect
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collect in self.collectors:
+            for metric in collect():
+                lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry            = Registry()
+phase_seconds       = registry.histogram("mpa_phase_seconds", "Durasi fase kerja callback (filter, cube, build, serialize, ...)", ["phase"])
+requests_total      = registry.counter("mpa_http_requests_total", "Jumlah request HTTP", ["path", "method", "status"])
+request_seconds     = registry.histogram("mpa_http_request_seconds", "Latency request HTTP", ["path"])
+callback_seconds    = registry.histogram("mpa_callback_seconds", "Latency callback dash per output", ["callback"])
+callbacks_in_flight = registry.gauge("mpa_callbacks_in_flight", "Callback dash yang sedang berjalan")
+
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        phase_seconds.observe(seconds, phase=phase)
+        if has_request_context():
+            timings = g.setdefault("server_timing", {})
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+# Server-Timing: durasi dalam milidetik, fase yang sama dijumlahkan
+def server_timing(timings, total):
+    parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+    return ", ".join(parts + [f"total;dur={total * 1000:.2f}"])
+
+
+_dash_update = "/_dash-update-component"
+
+
+def _path(req):
+    # pakai pola route (bukan path asli) supaya label path tidak meledak jumlahnya
+    rule = req.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def install(server, path="/metrics"):
+    @server.before_request
+    def _start():
+        g.request_start = time.perf_counter()
+        if request.path.endswith(_dash_update):
+            g.in_flight = True
+            callbacks_in_flight.inc()
+
+    @server.after_request
+    def _finish(response):
+        start = g.get("request_start")
+        if start is None or request.path == path:
+            return response
+
+        total = time.perf_counter() - start
+        route = _path(request)
+        requests_total.inc(path=route, method=request.method, status=response.status_code)
+        request_seconds.observe(total, path=route)
+
+        if g.get("in_flight"):
+            body = request.get_json(silent=True) or {}
+            callback_seconds.observe(total, callback=body.get("output", "unknown"))
+            response.headers["Server-Timing"] = server_timing(g.get("server_timing", {}), total)
+        return response
+
+    @server.teardown_request
+    def _teardown(exc):
+        if g.pop("in_flight", False):
+            callbacks_in_flight.dec()
+
+    @server.route(path)
+    def _metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# runner untuk rantai .pipe() di curate. kalau instrumentasi mati, run_pipe hanya
+# menjalankan stage satu per satu (sama persis dengan df.pipe(a).pipe(b)...).
+# kalau hidup, tiap stage dicatat: waktu, jumlah baris masuk/keluar, byte frame dan RSS.
+#
+#   MPA_PIPE_TRACE=1     -> catat, ukuran frame pakai memory_usage(deep=False)
+#   MPA_PIPE_TRACE=deep  -> catat, ukuran frame termasuk isi string (lebih lambat)
+#   MPA_PIPE_TRACE_LOG=1 -> tulis juga satu baris log per stage (logger "curate.pipeline")
+
+log = logging.getLogger("curate.pipeline")
+
+_trace_env  = os.environ.get("MPA_PIPE_TRACE", "").lower()
+enabled     = _trace_env not in ("", "0", "off", "false")
+deep        = _trace_env == "deep"
+log_stages  = os.environ.get("MPA_PIPE_TRACE_LOG", "") not in ("", "0")
+
+# trace terakhir per nama pipeline (observe_fish, site_fish, ...)
+_last_traces    = {}
+_lock           = threading.Lock()
+
+# trace yang sedang dikumpulkan thread ini (lihat collect)
+_collecting     = threading.local()
+
+
+def enable(on=True, deep_memory=False, log_lines=False):
+    global enabled, deep, log_stages
+    enabled, deep, log_stages = on, deep_memory, log_lines
+
+
+# pengaturan saat ini, untuk diteruskan ke proses worker: enable(*settings())
+def settings():
+    return enabled, deep, log_stages
+
+
+def _rss():
+    # RSS saat ini (bukan peak); hanya tersedia di linux
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _shape(obj):
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), int(obj.memory_usage(index=True, deep=deep).sum())
+    return None, None
+
+
+def _delta(after, before):
+    return None if after is None or before is None else after - before
+
+
+def _sum(a, b):
+    return None if a is None or b is None else a + b
+
+
+class PipeTrace:
+    def __init__(self, name):
+        self.name       = name
+        self.stages     = []
+        self.started    = time.time()
+
+    def add(self, stage, seconds, rows_in, rows_out, bytes_in, bytes_out, rss_in, rss_out):
+        record = {
+            "stage"         : stage,
+            "seconds"       : seconds,
+            "rows_in"       : rows_in,
+            "rows_out"      : rows_out,
+            "bytes_in"      : bytes_in,
+            "bytes_out"     : bytes_out,
+            "bytes_delta"   : _delta(bytes_out, bytes_in),
+            "rss_delta"     : _delta(rss_out, rss_in),
+        }
+        self.stages.append(record)
+        if log_stages:
+            log.info("%s.%s %.4fs rows %s -> %s bytes %+d rss %+d", self.name, stage, seconds,
+                     rows_in, rows_out, record["bytes_delta"] or 0, record["rss_delta"] or 0)
+
+    # satu trace dari beberapa trace pipeline yang sama (misalnya per chunk / per workbook):
+    # waktu, baris dan byte per stage dijumlahkan, rss_delta diambil yang terbesar
+    @classmethod
+    def combined(cls, traces):
+        trace           = cls(traces[0].name)
+        trace.started   = min(t.started for t in traces)
+        stages          = {}
+        for t in traces:
+            for stage in t.stages:
+                total = stages.get(stage["stage"])
+                if total is None:
+                    stages[stage["stage"]] = dict(stage)
+                    continue
+                for field in ("seconds", "rows_in", "rows_out", "bytes_in", "bytes_out", "bytes_delta"):
+                    total[field] = _sum(total[field], stage[field])
+                if stage["rss_delta"] is not None:
+                    total["rss_delta"] = max(total["rss_delta"] or 0, stage["rss_delta"])
+        trace.stages    = list(stages.values())
+        return trace
+
+    @property
+    def seconds(self):
+        return sum(s["seconds"] for s in self.stages)
+
+    def to_dict(self):
+        return {"name": self.name, "started": self.started, "seconds": self.seconds, "stages": self.stages}
+
+    def report(self):
+        return pd.DataFrame(self.stages, columns=["stage", "seconds", "rows_in", "rows_out", "bytes_in",
+                                                  "bytes_out", "bytes_delta", "rss_delta"]).set_index("stage")
+
+
+# jalankan stages berurutan ke obj (frame, atau path untuk stage pertama yang membaca file)
+def run_pipe(obj, stages, name):
+    if not enabled:
+        for stage in stages:
+            obj = stage(obj)
+        return obj
+
+    trace = PipeTrace(name)
+    for stage in stages:
+        rows_in, bytes_in   = _shape(obj)
+        rss_in              = _rss()
+        start               = time.perf_counter()
+        obj                 = stage(obj)
+        seconds             = time.perf_counter() - start
+        rows_out, bytes_out = _shape(obj)
+        trace.add(stage.__name__, seconds, rows_in, rows_out, bytes_in, bytes_out, rss_in, _rss())
+
+    collected = getattr(_collecting, "traces", None)
+    if collected is not None:
+        collected.append(trace)
+    else:
+        with _lock:
+            _last_traces[name] = trace
+    if log_stages:
+        log.info("%s selesai %.4fs (%d stage)", name, trace.seconds, len(trace.stages))
+    return obj
+
+
+# kumpulkan trace run_pipe di thread ini (misalnya satu per chunk workbook) alih-alih
+# menimpa trace terakhir tiap chunk; daftar trace dicatat sekaligus lewat record()
+@contextmanager
+def collect():
+    previous            = getattr(_collecting, "traces", None)
+    traces              = []
+    _collecting.traces  = traces
+    try:
+        yield traces
+    finally:
+        _collecting.traces = previous
+
+
+# catat trace hasil collect (boleh berasal dari proses worker) sebagai trace terakhir,
+# digabung per nama pipeline
+def record(traces):
+    groups = {}
+    for trace in traces:
+        groups.setdefault(trace.name, []).append(trace)
+    with _lock:
+        for name, group in groups.items():
+            _last_traces[name] = PipeTrace.combined(group)
+
+
+def last_trace(name):
+    return _last_traces.get(name)
+
+
+def last_traces():
+    with _lock:
+        return dict(_last_traces)
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+
+import curate
+import shared
+import filter_index
+from filter_index import FilterIndex
+
+
+# entry point produksi (multi-worker). dataset dibersihkan sekali di proses master,
+# ditulis ke folder kolom memory-mapped (shared.publish), lalu tiap worker gunicorn
+# attach ke folder itu lewat env MPA_SHARED_DATA tanpa menyalin data:
+#
+#   python serve.py --workers 8 --bind 0.0.0.0:8050
+#
+# yang tetap dibangun per worker: cube agregat (sebanding jumlah kombinasi filter/bulan, bukan
+# baris; ~10 MB pada 5 juta baris sintetis), SiteDimension, dan cache figure/subset yang
+# dibatasi MPA_FIGURE_CACHE_BYTES / MPA_SUBSET_CACHE_BYTES
+#
+# app.py tetap bisa dijalankan langsung (python app.py) untuk development
+
+# bersihkan data (atau ambil dari cache parquet) lalu tulis ke folder bersama, termasuk
+# FilterIndex (codes + posting list sebanding jumlah baris, jadi ikut dibagi lewat memory map);
+# dilewati kalau folder untuk data + kode curate/index yang sama sudah ada
+def build_frames():
+    observe_fish, site_fish = curate.CurateData(curate.path_measure, curate.path_site).load()
+    return {"observe_fish": observe_fish, "site_fish": site_fish}
+
+
+def build_filter_index(frames):
+    return FilterIndex(frames["observe_fish"])
+
+
+def prepare():
+    return shared.publish(curate.data_key(filter_index), build_frames,
+                          derived={"filter_index": build_filter_index})
+
+
+def run(folder, workers, threads, bind, timeout):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("gunicorn belum terpasang (pip install -r requirements.txt)")
+
+    class DashApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("timeout", timeout)
+            # jangan preload: app diimport di tiap worker, setelah env MPA_SHARED_DATA diisi
+            self.cfg.set("preload_app", False)
+
+        # curate sudah diimport di master sebelum env diisi, jadi modul yang diwarisi worker
+        # (fork) membawa curate.data dengan shared_dir=None; folder dipasang di sini sebelum import app
+        def load(self):
+            curate.data.shared_dir = os.environ["MPA_SHARED_DATA"]
+            import app
+            return app.server
+
+    os.environ["MPA_SHARED_DATA"] = os.path.abspath(folder)
+    DashApplication().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="jalankan dashboard dengan beberapa worker dan dataset bersama")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4, help="thread per worker (callback panel jalan paralel)")
+    parser.add_argument("--bind", default="0.0.0.0:8050")
+    parser.add_argument("--timeout", type=int, default=120)
+    parser.add_argument("--prepare-only", action="store_true", help="hanya tulis dataset bersama lalu keluar")
+    args = parser.parse_args(argv)
+
+    folder = prepare()
+    print(f"dataset bersama: {folder}", flush=True)
+    if not args.prepare_only:
+        run(folder, args.workers, args.threads, args.bind, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+# dataset hasil curate disimpan sebagai folder kolom (.npy) yang dibuka dengan memory map.
+# tiap worker server yang attach ke folder yang sama berbagi page cache OS yang sama,
+# jadi data tidak disalin per worker (RAM tidak naik linear dengan jumlah worker).
+#
+#   kolom numerik / datetime    -> <i>.npy
+#   kolom category              -> <i>.codes.npy + <i>.categories.pkl
+#   kolom nullable (Int32, ...) -> <i>.values.npy + <i>.mask.npy
+#   kolom lain (object, kecil)  -> <i>.pkl (dibaca biasa, tidak di-mmap)
+#
+# objek turunan yang besarnya sebanding jumlah baris (misalnya FilterIndex) ikut ditulis
+# ke folder yang sama lewat save(folder), lalu dibuka worker dengan attach(folder)
+
+SHARED_DIR      = "dataset/.cache/shared"
+
+# naikkan kalau format folder berubah
+SHARED_FORMAT   = 2
+
+
+def _export_column(series, folder, i):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        np.save(os.path.join(folder, f"{i}.codes.npy"), series.cat.codes.to_numpy())
+        pd.to_pickle(series.cat.categories, os.path.join(folder, f"{i}.categories.pkl"))
+        return {"kind": "category", "ordered": bool(dtype.ordered)}
+    if isinstance(series.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        np.save(os.path.join(folder, f"{i}.values.npy"), series.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+        np.save(os.path.join(folder, f"{i}.mask.npy"), series.isna().to_numpy())
+        return {"kind": "masked"}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        np.save(os.path.join(folder, f"{i}.npy"), series.to_numpy())
+        return {"kind": "numpy"}
+    series.to_pickle(os.path.join(folder, f"{i}.pkl"))
+    return {"kind": "pickle"}
+
+
+def export_frame(df, folder):
+    os.makedirs(folder, exist_ok=True)
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = _export_column(df[name], folder, i)
+        column.update(name=name, dtype=str(df[name].dtype))
+        columns.append(column)
+
+    with open(os.path.join(folder, "frame.json"), "w") as f:
+        json.dump({"rows": len(df), "columns": columns}, f, indent=3)
+
+
+def _attach_column(column, folder, i, mmap_mode):
+    kind = column["kind"]
+    if kind == "category":
+        codes       = np.load(os.path.join(folder, f"{i}.codes.npy"), mmap_mode=mmap_mode)
+        categories  = pd.read_pickle(os.path.join(folder, f"{i}.categories.pkl"))
+        return pd.Categorical.from_codes(codes, categories=categories, ordered=column["ordered"], validate=False)
+    if kind == "masked":
+        values  = np.load(os.path.join(folder, f"{i}.values.npy"), mmap_mode=mmap_mode)
+        mask    = np.load(os.path.join(folder, f"{i}.mask.npy"), mmap_mode=mmap_mode)
+        if values.dtype.kind == "f":
+            return pd.arrays.FloatingArray(values, mask)
+        if values.dtype.kind == "b":
+            return pd.arrays.BooleanArray(values, mask)
+        return pd.arrays.IntegerArray(values, mask)
+    if kind == "numpy":
+        return np.load(os.path.join(folder, f"{i}.npy"), mmap_mode=mmap_mode)
+    return pd.read_pickle(os.path.join(folder, f"{i}.pkl"))
+
+
+# buka frame tanpa menyalin data kolom; mmap_mode "r" = read-only, "c" = copy-on-write per proses
+def attach_frame(folder, mmap_mode="r"):
+    with open(os.path.join(folder, "frame.json")) as f:
+        meta = json.load(f)
+
+    data = {column["name"]: _attach_column(column, folder, i, mmap_mode)
+            for i, column in enumerate(meta["columns"])}
+    return pd.DataFrame(data, columns=[c["name"] for c in meta["columns"]], copy=False)
+
+
+def _read_meta(folder):
+    with open(os.path.join(folder, "dataset.json")) as f:
+        return json.load(f)
+
+
+def _complete(folder):
+    return os.path.exists(os.path.join(folder, "dataset.json")) and _read_meta(folder).get("format") == SHARED_FORMAT
+
+
+# tulis hasil build() (dict nama -> DataFrame) ke SHARED_DIR/<key>; kalau folder untuk key
+# itu sudah ada, build() tidak dipanggil. folder disusun di tmp lalu di-rename, jadi worker
+# tidak pernah melihat folder setengah jadi. folder untuk key lain (data/versi lama) dihapus.
+# derived: dict nama -> fungsi(frames) yang mengembalikan objek dengan save(folder)
+def publish(key, build, root=SHARED_DIR, derived=None):
+    folder  = os.path.join(root, key)
+    derived = derived or {}
+    if not _complete(folder):
+        frames  = build()
+        tmp     = f"{folder}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        for name, df in frames.items():
+            export_frame(df, os.path.join(tmp, name))
+        for name, build_derived in derived.items():
+            build_derived(frames).save(os.path.join(tmp, name))
+        with open(os.path.join(tmp, "dataset.json"), "w") as f:
+            json.dump({"format": SHARED_FORMAT, "key": key, "frames": list(frames), "derived": list(derived)}, f, indent=3)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+
+    for entry in os.listdir(root):
+        if entry != key:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return folder
+
+
+# buka semua frame di folder hasil publish; return dict nama -> DataFrame
+def attach(folder, mmap_mode="r"):
+    meta = _read_meta(folder)
+    if meta.get("format") != SHARED_FORMAT:
+        raise ValueError(f"format dataset bersama {folder} tidak dikenal: {meta.get('format')}")
+    return {name: attach_frame(os.path.join(folder, name), mmap_mode) for name in meta["frames"]}
+
+
+# folder objek turunan `name` di dataset bersama, None kalau tidak ikut dipublish
+def derived_folder(folder, name):
+    if name not in _read_meta(folder).get("derived", []):
+        return None
+    return os.path.join(folder, name)
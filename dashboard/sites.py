@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+
+# kolom site_fish yang dipakai panel site (peta, environmental factors)
+SITE_COLUMNS = ["site_name", "mpa/control", "mpa", "latitude", "longitude", "visibility", "bleaching"]
+
+
+# site_fish sebagai tabel dimensi ber-index sea_site_id, dibangun sekali per versi data.
+# tiap baris sudah tahu posisi sea_site_id-nya di kategori observe_fish (kode yang sama
+# dengan tabel agregat per site dari cube), jadi agregat per site cukup disebar ke baris
+# dimensi dengan take O(site), tanpa groupby/merge per interaksi.
+# site yang tidak punya observasi sama sekali mendapat kode -1
+class SiteDimension:
+    def __init__(self, site_fish, site_ids):
+        self.site_ids   = pd.Index(site_ids)
+        self.frame      = site_fish[["sea_site_id"] + SITE_COLUMNS].set_index("sea_site_id")
+        self.codes      = self.site_ids.get_indexer(self.frame.index)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # agregat per site (frame dengan kolom sea_site_id, hasil cube) -> array per site id
+    # (posisi = kode kategori), NaN untuk site yang tidak ada di agregat
+    def dense(self, aggregate, column):
+        ids = aggregate["sea_site_id"]
+        if isinstance(ids.dtype, pd.CategoricalDtype) and ids.cat.categories.equals(self.site_ids):
+            codes = ids.cat.codes.to_numpy()
+        else:
+            codes = self.site_ids.get_indexer(ids)
+
+        # slot terakhir untuk kode -1 (site tanpa observasi), selalu NaN
+        values = np.full(len(self.site_ids) + 1, np.nan)
+        keep = codes >= 0
+        values[codes[keep]] = aggregate[column].to_numpy(dtype="float64")[keep]
+        return values
+
+    # nilai agregat untuk tiap baris dimensi (urutan site_fish), NaN = tidak ada data
+    def aligned(self, aggregate, column):
+        return self.dense(aggregate, column)[self.codes]
@@ -0,0 +1,279 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# sketch kuantil yang bisa digabung (gaya DDSketch): nilai positif dimasukkan ke bucket
+# logaritmik gamma^(k-1) < x <= gamma^k, jadi kuantil apa pun punya galat relatif <= alpha.
+# gabung dua sketch = jumlahkan count per bucket, sehingga sketch per sel cube bisa
+# di-rollup ke kombinasi filter apa pun tanpa membaca ulang baris data.
+# nilai di bawah MIN_VALUE (termasuk 0) masuk bucket nol; nilai negatif tidak didukung
+
+DEFAULT_ALPHA   = 0.01
+MIN_VALUE       = 1e-9
+
+
+def _gamma(alpha):
+    return (1 + alpha) / (1 - alpha)
+
+
+def _keys(values, log_gamma):
+    return np.ceil(np.log(values) / log_gamma).astype(np.int64)
+
+
+def _clean(values):
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    if (values < 0).any():
+        raise ValueError("quantile sketch tidak mendukung nilai negatif")
+    return values
+
+
+class QuantileSketch:
+    def __init__(self, alpha=DEFAULT_ALPHA, offset=0, counts=None, zero_count=0,
+                 min=math.inf, max=-math.inf):
+        self.alpha      = alpha
+        self.gamma      = _gamma(alpha)
+        self.log_gamma  = math.log(self.gamma)
+        self.offset     = offset
+        self.counts     = np.zeros(0, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.zero_count = int(zero_count)
+        self.min        = float(min)
+        self.max        = float(max)
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("alpha sketch berbeda, tidak bisa digabung")
+        if len(other.counts) == 0:
+            counts, offset = self.counts, self.offset
+        elif len(self.counts) == 0:
+            counts, offset = other.counts, other.offset
+        else:
+            offset  = min(self.offset, other.offset)
+            stop    = max(self.offset + len(self.counts), other.offset + len(other.counts))
+            counts  = np.zeros(stop - offset, dtype=np.int64)
+            counts[self.offset - offset:self.offset - offset + len(self.counts)] += self.counts
+            counts[other.offset - offset:other.offset - offset + len(other.counts)] += other.counts
+        return QuantileSketch(self.alpha, offset, counts, self.zero_count + other.zero_count,
+                              min(self.min, other.min), max(self.max, other.max))
+
+    # nilai wakil tiap bucket yang tidak kosong (naik) dan jumlahnya; bucket nol diwakili 0
+    def buckets(self):
+        keys    = np.nonzero(self.counts)[0]
+        values  = 2 * self.gamma ** (keys + self.offset) / (self.gamma + 1)
+        counts  = self.counts[keys]
+        if self.zero_count:
+            values = np.concatenate([[0.0], values])
+            counts = np.concatenate([[self.zero_count], counts])
+        return values, counts
+
+    def quantiles(self, qs):
+        values, counts = self.buckets()
+        if len(values) == 0:
+            return np.full(len(qs), np.nan)
+        cumulative  = np.cumsum(counts)
+        ranks       = np.asarray(qs, dtype="float64") * (cumulative[-1] - 1)
+        found       = values[np.searchsorted(cumulative, ranks, side="right")]
+        return np.clip(found, self.min, self.max)
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+
+# sketch per grup sekaligus (misalnya per sel cube): matriks count [grup x bucket]
+# dengan offset bersama, jadi rollup = jumlahkan baris matriks yang dipilih
+class SketchTable:
+    def __init__(self, values, groups, n_groups, alpha=DEFAULT_ALPHA):
+        values      = np.asarray(values, dtype="float64")
+        groups      = np.asarray(groups)
+        valid       = ~np.isnan(values)
+        values      = values[valid]
+        groups      = groups[valid]
+        if (values < 0).any():
+            raise ValueError("quantile sketch tidak mendukung nilai negatif")
+
+        self.alpha  = alpha
+        log_gamma   = math.log(_gamma(alpha))
+        positive    = values >= MIN_VALUE
+        keys        = _keys(values[positive], log_gamma)
+        self.offset = int(keys.min()) if len(keys) else 0
+        width       = int(keys.max()) - self.offset + 1 if len(keys) else 0
+
+        self.counts     = np.bincount(groups[positive] * width + (keys - self.offset),
+                                      minlength=n_groups * width).reshape(n_groups, width)
+        self.zero_count = np.bincount(groups[~positive], minlength=n_groups)
+
+        mins        = np.full(n_groups, np.inf)
+        maxs        = np.full(n_groups, -np.inf)
+        np.minimum.at(mins, groups, values)
+        np.maximum.at(maxs, groups, values)
+        self.mins   = mins
+        self.maxs   = maxs
+
+    # tabel gabungan dua SketchTable; a_rows/b_rows = nomor grup baru untuk tiap grup a/b
+    # (grup yang sama di kedua tabel count-nya dijumlahkan)
+    @classmethod
+    def combined(cls, a, a_rows, b, b_rows, n_groups):
+        if a.alpha != b.alpha:
+            raise ValueError("alpha sketch berbeda, tidak bisa digabung")
+        spans   = [(t.offset, t.offset + t.counts.shape[1]) for t in (a, b) if t.counts.shape[1]]
+        offset  = min((start for start, _ in spans), default=0)
+        stop    = max((stop for _, stop in spans), default=0)
+
+        table               = cls.__new__(cls)
+        table.alpha         = a.alpha
+        table.offset        = offset
+        table.counts        = np.zeros((n_groups, stop - offset), dtype=np.int64)
+        table.zero_count    = np.zeros(n_groups, dtype=np.int64)
+        table.mins          = np.full(n_groups, np.inf)
+        table.maxs          = np.full(n_groups, -np.inf)
+        for t, rows in ((a, a_rows), (b, b_rows)):
+            start = t.offset - offset
+            table.counts[rows, start:start + t.counts.shape[1]] += t.counts
+            np.add.at(table.zero_count, rows, t.zero_count)
+            np.minimum.at(table.mins, rows, t.mins)
+            np.maximum.at(table.maxs, rows, t.maxs)
+        return table
+
+    # gabungkan sketch grup-grup yang dipilih (index atau mask boolean)
+    def merged(self, rows):
+        return QuantileSketch(self.alpha, self.offset, self.counts[rows].sum(axis=0),
+                              self.zero_count[rows].sum(), self.mins[rows].min(initial=np.inf),
+                              self.maxs[rows].max(initial=-np.inf))
+
+
+def _spread(outliers, max_outliers):
+    # ambil paling banyak max_outliers titik, tersebar merata (ekstrem selalu ikut)
+    outliers = np.unique(outliers)
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.unique(np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int))]
+    return outliers
+
+
+def _box(q1, median, q3, lowerfence, upperfence, outliers, count, max_outliers):
+    return {
+        "q1"            : float(q1),
+        "median"        : float(median),
+        "q3"            : float(q3),
+        "lowerfence"    : float(lowerfence),
+        "upperfence"    : float(upperfence),
+        "outliers"      : _spread(outliers, max_outliers).tolist(),
+        "count"         : int(count),
+    }
+
+
+# statistik boxplot (kuartil, whisker 1.5 IQR ala plotly, outlier dibatasi) dari nilai mentah
+def box_stats(values, max_outliers=100):
+    values = np.sort(_clean(values))
+    if len(values) == 0:
+        return None
+    q1, median, q3  = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr             = q3 - q1
+    inside          = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outside         = values[(values < inside[0]) | (values > inside[-1])]
+    return _box(q1, median, q3, inside[0], inside[-1], outside, len(values), max_outliers)
+
+
+# statistik boxplot dari sketch; whisker/outlier memakai nilai wakil bucket
+# (galat relatif <= alpha), min/max tetap eksak
+def sketch_box_stats(sketch, max_outliers=100):
+    if sketch.count == 0:
+        return None
+    q1, median, q3  = sketch.quantiles([0.25, 0.5, 0.75])
+    iqr             = q3 - q1
+    low, high       = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    values, _       = sketch.buckets()
+    values          = np.clip(values, sketch.min, sketch.max)
+    values[0], values[-1] = sketch.min, sketch.max
+    inside          = values[(values >= low) & (values <= high)]
+    if len(inside) == 0:
+        inside = np.array([median])
+    outside         = values[(values < inside[0]) | (values > inside[-1])]
+    return _box(q1, median, q3, inside[0], inside[-1], outside, sketch.count, max_outliers)
+
+
+# sketch distinct count yang bisa digabung (HyperLogLog, 64-bit hash): 2^precision register,
+# tiap register menyimpan posisi bit 1 pertama terbesar dari hash yang jatuh ke register itu.
+# gabung = max per register, jadi sketch per sel cube bisa di-union ke kombinasi filter apa pun.
+# galat relatif standar ~1.04 / sqrt(2^precision) (precision 12 -> ~1.6%, 95% hasil dalam ~3.3%);
+# kardinalitas kecil (< 2.5 * 2^precision) diestimasi dengan linear counting dari register kosong
+
+DEFAULT_PRECISION   = 12
+
+
+def distinct_error(precision=DEFAULT_PRECISION):
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def _hash(values):
+    values = pd.Series(values)
+    values = values[values.notna()]
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values):
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big             = values >= np.uint64(1 << shift)
+        length[big]    += shift
+        values          = np.where(big, values >> np.uint64(shift), values)
+    return length + (values > 0)
+
+
+# hash -> (nomor register, rank = jumlah nol di depan bit sisa + 1)
+def _registers(hashes, precision):
+    width   = 64 - precision
+    index   = (hashes >> np.uint64(width)).astype(np.int64)
+    rest    = hashes & np.uint64((1 << width) - 1)
+    return index, (width + 1 - _bit_length(rest)).astype(np.uint8)
+
+
+# estimasi kardinalitas untuk tiap baris matriks register [n x 2^precision]
+def distinct_estimate(registers):
+    registers   = np.atleast_2d(registers)
+    m           = registers.shape[1]
+    alpha       = 0.7213 / (1 + 1.079 / m)
+    estimate    = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int64)).sum(axis=1)
+    zeros       = (registers == 0).sum(axis=1)
+    small       = (estimate <= 2.5 * m) & (zeros > 0)
+    with np.errstate(divide="ignore"):
+        estimate[small] = m * np.log(m / zeros[small])
+    return estimate
+
+
+# sketch distinct count per grup sekaligus (misalnya per sel cube): matriks register
+# [grup x 2^precision], union grup terpilih = max per kolom
+class DistinctTable:
+    def __init__(self, values, groups, n_groups, precision=DEFAULT_PRECISION):
+        values          = pd.Series(values).reset_index(drop=True)
+        groups          = np.asarray(groups)[values.notna().to_numpy()]
+        index, rank     = _registers(_hash(values), precision)
+
+        self.precision  = precision
+        self.registers  = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+        np.maximum.at(self.registers, (groups, index), rank)
+
+    # tabel gabungan dua DistinctTable; a_rows/b_rows = nomor grup baru untuk tiap grup a/b
+    @classmethod
+    def combined(cls, a, a_rows, b, b_rows, n_groups):
+        if a.precision != b.precision:
+            raise ValueError("precision sketch berbeda, tidak bisa digabung")
+        table           = cls.__new__(cls)
+        table.precision = a.precision
+        table.registers = np.zeros((n_groups, 1 << a.precision), dtype=np.uint8)
+        for t, rows in ((a, a_rows), (b, b_rows)):
+            np.maximum.at(table.registers, np.asarray(rows), t.registers)
+        return table
+
+    # estimasi distinct count per grup gabungan: groups = nomor grup gabungan tiap baris tabel
+    # (0..n-1, misalnya ngroup sel per kombinasi filter)
+    def union_counts(self, groups, n):
+        order   = np.argsort(groups, kind="stable")
+        starts  = np.searchsorted(groups[order], np.arange(n))
+        return distinct_estimate(np.maximum.reduceat(self.registers[order], starts, axis=0))
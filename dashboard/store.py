@@ -0,0 +1,296 @@
+import hashlib
+import inspect
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+import pipeline
+
+
+# folder store hasil curate, isinya part parquet + manifest json
+CACHE_DIR           = "dataset/.cache"
+
+# naikkan kalau format cache berubah
+CACHE_FORMAT        = 1
+
+
+# hash isi file, dibaca per blok supaya file besar tidak masuk memory sekaligus
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# identitas file sumber: path, mtime, ukuran, dan hash isi
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return {
+        "path"      : os.path.abspath(path),
+        "mtime_ns"  : stat.st_mtime_ns,
+        "size"      : stat.st_size,
+        "sha256"    : file_sha256(path),
+    }
+
+
+# versi pipeline = hash source code modul pembersih data
+# jadi setiap perubahan kode cleaning otomatis bikin cache lama tidak valid
+def pipeline_version(*modules):
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(inspect.getsource(module).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cache_key(paths, version):
+    payload = {
+        "format"    : CACHE_FORMAT,
+        "sources"   : [file_fingerprint(p) for p in paths],
+        "pipeline"  : version,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# parquet menyimpan kolom object sebagai tipe aslinya (float, int, date),
+# kembalikan dtype kolom seperti hasil pipeline
+def restore_dtypes(df, dtypes):
+    dtypes = {col: dtype for col, dtype in dtypes.items() if str(df[col].dtype) != dtype}
+    if dtypes:
+        df = df.astype(dtypes)
+    return df
+
+
+# ------ - - --- - - -- - - -- - -- -- -- - - - --- - -  - - - -- - - -- - - - - - - --  -- - - - - - - - - - -
+# store bertahap: hasil curate disimpan sebagai beberapa part parquet, urut sesuai waktu masuk.
+# manifest mencatat tiap file sumber (fingerprint, jumlah baris, hash baris) dan part-nya.
+#   - file baru                     -> dibersihkan, jadi part baru di akhir
+#   - file yang hanya ditambah baris -> hanya baris baru yang dibersihkan, jadi part baru di akhir
+#   - file diubah/dihapus, atau versi pipeline berubah -> part file itu dibuang dan dibangun ulang
+# kalau semua perubahan berupa penambahan, frame baru = frame lama + baris di akhir,
+# sehingga index/agregat turunan juga bisa diperbarui bertahap.
+# yang sebanding dengan delta hanya pembersihan, penulisan part dan pembaruan turunan:
+# workbook yang ditambah barisnya tetap dibaca (dan di-hash) dari awal karena xlsx tidak bisa
+# dibaca mulai dari tengah, dan frame di memory dibentuk ulang lewat concat (salinan seluruh baris)
+
+def _manifest_path(name, cache_dir):
+    return os.path.join(cache_dir, f"{name}.parts.json")
+
+
+def _load_manifest(name, version, cache_dir):
+    try:
+        with open(_manifest_path(name, cache_dir), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+
+    if manifest is None or manifest.get("format") != CACHE_FORMAT or manifest.get("pipeline") != version:
+        manifest = {"format": CACHE_FORMAT, "pipeline": version, "sources": {}, "parts": [], "dtypes": {}}
+    return manifest
+
+
+# gabungkan part; kolom category disatukan kategorinya (urutan kemunculan, jadi kode
+# kategori part lama tidak berubah) supaya hasil concat tetap category
+def concat_frames(frames):
+    frames = [df for df in frames if df is not None]
+    if len(frames) == 1:
+        return frames[0]
+
+    frames = [df.copy(deep=False) for df in frames]
+    for col in frames[0].columns:
+        if all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames):
+            categories = union_categoricals([df[col].array for df in frames]).categories
+            for df in frames:
+                df[col] = df[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+# tulis frame bersih ke satu file part parquet, chunk demi chunk (satu row group per chunk),
+# jadi file besar tidak perlu ada utuh di memory. kategori kolom category bisa beda antar chunk
+# (dan lebar kodenya int8/int16), index dictionary diseragamkan ke int32 supaya schema sama
+class _PartWriter:
+    def __init__(self, source, cache_dir, name):
+        self.file       = f"{name}.{uuid.uuid4().hex[:12]}.parquet"
+        self.source     = source
+        self.path       = os.path.join(cache_dir, self.file)
+        self.rows       = 0
+        self.frame      = None
+        self._writer    = None
+
+    def write(self, df):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            schema = pa.schema([
+                field.with_type(pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+                if pa.types.is_dictionary(field.type) else field
+                for field in table.schema
+            ], metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self.path + ".tmp", schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows   += len(df)
+        # part yang hanya satu chunk tidak perlu dibaca ulang dari parquet
+        self.frame  = df if self.rows == len(df) else None
+
+    # return (part, frame) atau (None, None) kalau tidak ada baris; frame None = baca dari parquet
+    def close(self):
+        if self._writer is None:
+            return None, None
+        self._writer.close()
+        os.replace(self.path + ".tmp", self.path)
+        return {"file": self.file, "source": self.source, "rows": self.rows}, self.frame
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self.path + ".tmp")
+
+
+# satu kali baca file sumber: hash baris dihitung per chunk; baris sebelum keep (jumlah baris
+# yang sudah ada di store) hanya di-hash, sisanya dibersihkan dan ditulis ke part baru.
+# return None kalau prefix keep baris ternyata beda dengan yang tercatat di manifest
+def _read_source(path, entry, keep, read, clean, cache_dir, name):
+    chunks  = read(path)
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    digest  = hashlib.sha256()
+    rows    = 0
+    writer  = _PartWriter(os.path.abspath(path), cache_dir, name)
+    try:
+        for raw in chunks:
+            row_hashes  = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+            skip        = min(max(keep - rows, 0), len(raw))
+            digest.update(row_hashes[:skip].tobytes())
+            rows        += skip
+            if skip and rows == keep and digest.hexdigest() != entry["prefix_hash"]:
+                writer.discard()
+                return None
+
+            digest.update(row_hashes[skip:].tobytes())
+            rows        += len(raw) - skip
+            if skip < len(raw):
+                writer.write(clean(raw.iloc[skip:].reset_index(drop=True)))
+            # lepas chunk ini sebelum chunk berikutnya dibaca
+            raw = row_hashes = None
+    except BaseException:
+        writer.discard()
+        raise
+
+    if rows < keep:
+        writer.discard()
+        return None
+    part, frame = writer.close()
+    return {"rows": rows, "prefix_hash": digest.hexdigest()}, part, frame
+
+
+# baca + bersihkan satu file sumber (jalan di proses worker kalau sync_parts diberi executor).
+# read(path) boleh return frame mentah utuh atau iterator chunk frame mentah (memory puncak
+# sebesar chunk). return (fingerprint baru, part atau None, frame bersih atau None, append, traces):
+# append = False kalau isi lama file berubah, jadi part lama file itu harus dibuang dan
+# file dibaca ulang dari awal. traces = trace pipeline tiap chunk yang dibersihkan
+# (pengaturan trace proses utama ikut dikirim, worker spawn tidak mewarisinya)
+def _sync_source(task):
+    path, entry, fingerprint, read, clean, cache_dir, name, trace = task
+    pipeline.enable(*trace)
+    with pipeline.collect() as traces:
+        result = _read_source(path, entry, entry["rows"], read, clean, cache_dir, name) if entry else None
+        append = result is not None or entry is None
+        if result is None:
+            result = _read_source(path, entry, 0, read, clean, cache_dir, name)
+
+    counts, part, frame = result
+    return dict(fingerprint, **counts), part, frame, append, traces
+
+
+# samakan store dengan daftar file sumber; read(path) -> frame mentah, clean(frame mentah) -> frame bersih.
+# current = frame hasil sync sebelumnya (kalau ada di memory), supaya part lama tidak dibaca ulang.
+# executor (misalnya ProcessPoolExecutor) dipakai untuk membaca + membersihkan beberapa file
+# sekaligus; read dan clean harus fungsi level modul supaya bisa dikirim ke proses worker.
+# return (frame, appended, changed): appended = jumlah baris baru di akhir frame (None kalau
+# ada perubahan selain penambahan, artinya turunan harus dibangun ulang), changed = ada perubahan
+def sync_parts(name, paths, version, read, clean, current=None, cache_dir=CACHE_DIR, executor=None):
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest        = _load_manifest(name, version, cache_dir)
+    sources         = manifest["sources"]
+    parts           = manifest["parts"]
+    cleaned         = {}
+    append_only     = True
+    wanted          = {os.path.abspath(p) for p in paths}
+
+    # file sumber yang hilang -> part-nya dibuang
+    for source in [s for s in sources if s not in wanted]:
+        del sources[source]
+        parts       = [p for p in parts if p["source"] != source]
+        append_only = False
+    changed = not append_only
+
+    tasks = []
+    for path in paths:
+        source  = os.path.abspath(path)
+        entry   = sources.get(source)
+        stat    = os.stat(path)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            continue
+
+        fingerprint = file_fingerprint(path)
+        if entry and entry["sha256"] == fingerprint["sha256"]:
+            entry.update(fingerprint)
+            continue
+        tasks.append((path, entry, fingerprint, read, clean, cache_dir, name, pipeline.settings()))
+
+    results = executor.map(_sync_source, tasks) if executor is not None and len(tasks) > 1 else map(_sync_source, tasks)
+    traces  = []
+    for task, (entry, part, frame, append, task_traces) in zip(tasks, results):
+        traces.extend(task_traces)
+        source = os.path.abspath(task[0])
+        if not append:
+            parts       = [p for p in parts if p["source"] != source]
+            append_only = False
+        if part is not None:
+            parts.append(part)
+            if frame is None:
+                frame = pd.read_parquet(os.path.join(cache_dir, part["file"]))
+            cleaned[part["file"]] = frame
+            if not manifest["dtypes"]:
+                manifest["dtypes"] = {col: str(dtype) for col, dtype in frame.dtypes.items()}
+        sources[source] = entry
+        changed = True
+
+    # trace semua chunk/file yang dibersihkan digabung jadi trace terakhir pipeline
+    if traces:
+        pipeline.record(traces)
+
+    manifest["parts"] = parts
+    if changed:
+        tmp = _manifest_path(name, cache_dir) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=3)
+        os.replace(tmp, _manifest_path(name, cache_dir))
+        _remove_orphans(name, parts, cache_dir)
+
+    # semua part diseragamkan ke dtype part pertama (kolom angka yang di satu file kosong, dst)
+    appended = sum(len(f) for f in cleaned.values()) if append_only else None
+    if current is not None and append_only:
+        frames = [current] + [cleaned[p["file"]] for p in parts if p["file"] in cleaned]
+    else:
+        frames = [cleaned.get(p["file"]) for p in parts]
+        frames = [f if f is not None else pd.read_parquet(os.path.join(cache_dir, p["file"]))
+                  for f, p in zip(frames, parts)]
+    frames  = [restore_dtypes(f, manifest["dtypes"]) for f in frames]
+    frame   = concat_frames(frames) if frames else None
+    return frame, appended, changed
+
+
+def _remove_orphans(name, parts, cache_dir):
+    keep = {p["file"] for p in parts}
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(f"{name}.") and entry.endswith(".parquet") and entry not in keep:
+            try:
+                os.remove(os.path.join(cache_dir, entry))
+            except OSError:
+                pass
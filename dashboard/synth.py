@@ -0,0 +1,234 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# data sintetis dengan format sama persis seperti hasil
+# pd.read_excel(path, dtype=str).fillna("n/a") dari mpa_fish.xlsx / mpa_site.xlsx,
+# dipakai untuk verifikasi dan benchmark tanpa butuh dataset asli
+
+# family -> trophic, urutan kira-kira dari yang paling sering muncul
+FAMILIES = {
+    "Pomacentridae"     : "Planktivore",
+    "Labridae"          : "Invertivore",
+    "Acanthuridae"      : "Herbivore",
+    "Scaridae"          : "Herbivore",
+    "Chaetodontidae"    : "Corallivore",
+    "Serranidae"        : "Carnivore",
+    "Lutjanidae"        : "Carnivore",
+    "Caesionidae"       : "Planktivore",
+    "Haemulidae"        : "Invertivore",
+    "Siganidae"         : "Herbivore",
+    "Mullidae"          : "Invertivore",
+    "Lethrinidae"       : "Carnivore",
+    "Nemipteridae"      : "Invertivore",
+    "Pomacanthidae"     : "Omnivore",
+    "Balistidae"        : "Invertivore",
+    "Carangidae"        : "Piscivore",
+}
+
+MEASURE_COLUMNS = [
+    "Control/MPA", "Year", "Month", "Transect", "Depth (m)", "Area (m2)", "Size (cm)",
+    "Ind Weight (kg)", "Density (n/ha)", "Biomass (kg/ha)", "Number Individu (n)",
+    "Trophic", "Family", "Species", "Site Name", "Sea Site ID",
+]
+
+SITE_COLUMNS = [
+    "Rec ID", "Sea Site ID", "Site Name", "MPA/Control", "MPA", "Latitude", "Longitude",
+    "Dive No.", "Slope Angle", "Visibility", "Bleaching", "Date of Survey", "Time",
+    "Remarks", "Surveyor",
+]
+
+
+# angka desimal pakai koma, seperti isi excel aslinya
+def _comma_decimal(values, decimals):
+    return pd.Series(np.round(values, decimals)).astype(str).str.replace(".", ",", regex=False).to_numpy()
+
+
+def _species_table(species_per_family):
+    family, trophic, species = [], [], []
+    for name, level in FAMILIES.items():
+        for i in range(species_per_family):
+            family.append(name)
+            trophic.append(level)
+            species.append(f"{name[:-4]} sp{i + 1}")
+    return np.array(family), np.array(trophic), np.array(species)
+
+
+def _site_table(n_sites, seed):
+    rng         = np.random.default_rng(seed)
+    site_ids    = np.array([f"SS{i + 1:04d}" for i in range(n_sites)])
+    site_names  = np.array([f"Site {i + 1}" for i in range(n_sites)])
+    control     = np.where(rng.random(n_sites) < 0.6, "MPA", "Control")
+    latitude    = rng.uniform(-10.5, -0.5, n_sites)
+    longitude   = rng.uniform(105.0, 135.0, n_sites)
+    return site_ids, site_names, control, latitude, longitude
+
+
+# kolom observasi dalam bentuk angka + index ke tabel species/site
+def _measure_arrays(n, n_sites, species_per_family, years, seed):
+    rng = np.random.default_rng(seed)
+
+    family, trophic, species            = _species_table(species_per_family)
+    site_ids, site_names, control, _, _ = _site_table(n_sites, seed)
+
+    # popularitas spesies dan site tidak merata (zipf-like)
+    species_p   = 1.0 / np.arange(1, len(species) + 1) ** 0.8
+    species_idx = rng.choice(len(species), n, p=species_p / species_p.sum())
+    site_p      = 1.0 / np.arange(1, n_sites + 1) ** 0.5
+    site_idx    = rng.choice(n_sites, n, p=site_p / site_p.sum())
+
+    area        = np.where(rng.random(n) < 0.8, 250.0, 350.0)
+    size        = np.clip(rng.lognormal(2.6, 0.5, n), 2, 120).astype(int)
+    number      = rng.geometric(0.25, n)
+    weight      = 0.0000125 * size.astype(float) ** 3.05
+
+    return {
+        "species_idx"   : species_idx,
+        "site_idx"      : site_idx,
+        "family"        : family,
+        "trophic"       : trophic,
+        "species"       : species,
+        "site_ids"      : site_ids,
+        "site_names"    : site_names,
+        "control"       : control,
+        "year"          : rng.integers(years[0], years[1] + 1, n),
+        "month"         : rng.integers(1, 13, n),
+        "transect"      : rng.integers(1, 4, n),
+        "depth"         : rng.uniform(2.0, 18.0, n),
+        "area"          : area,
+        "size"          : size,
+        "number"        : number,
+        "weight"        : weight,
+        "density"       : number / area * 10000,
+        "biomass"       : number * weight / area * 10000,
+    }
+
+
+# frame observasi ikan mentah, n baris
+def make_measure_df(n, n_sites=60, species_per_family=12, years=(2012, 2024), seed=0):
+    a           = _measure_arrays(n, n_sites, species_per_family, years, seed)
+    species_idx = a["species_idx"]
+    site_idx    = a["site_idx"]
+
+    df = pd.DataFrame({
+        "Control/MPA"           : a["control"][site_idx],
+        "Year"                  : a["year"].astype(str),
+        "Month"                 : a["month"].astype(str),
+        "Transect"              : a["transect"].astype(str),
+        "Depth (m)"             : _comma_decimal(a["depth"], 1),
+        "Area (m2)"             : _comma_decimal(a["area"], 0),
+        "Size (cm)"             : a["size"].astype(str),
+        "Ind Weight (kg)"       : _comma_decimal(a["weight"], 4),
+        "Density (n/ha)"        : _comma_decimal(a["density"], 2),
+        "Biomass (kg/ha)"       : _comma_decimal(a["biomass"], 3),
+        "Number Individu (n)"   : a["number"].astype(str),
+        "Trophic"               : a["trophic"][species_idx],
+        "Family"                : a["family"][species_idx],
+        "Species"               : a["species"][species_idx],
+        "Site Name"             : a["site_names"][site_idx],
+        "Sea Site ID"           : a["site_ids"][site_idx],
+    }, columns=MEASURE_COLUMNS)
+
+    return df.astype(object)
+
+
+# category dengan urutan kategori terurut, sama seperti astype("category")
+def _categorical(lookup, idx):
+    categories  = np.unique(lookup)
+    codes       = np.searchsorted(categories, lookup)[idx]
+    return pd.Categorical.from_codes(codes, categories)
+
+
+# observe_fish yang sudah bersih (dtype sesuai curate.observe_schema) tanpa lewat
+# string mentah, supaya benchmark dashboard bisa sampai puluhan juta baris
+def make_observe_fish(n, n_sites=60, species_per_family=12, years=(2012, 2024), seed=0):
+    a           = _measure_arrays(n, n_sites, species_per_family, years, seed)
+    species_idx = a["species_idx"]
+    site_idx    = a["site_idx"]
+
+    return pd.DataFrame({
+        "control/mpa"           : _categorical(a["control"], site_idx),
+        "year"                  : a["year"].astype("int16"),
+        "month"                 : a["month"].astype("int8"),
+        "transect"              : a["transect"].astype("int8"),
+        "depth_(m)"             : np.round(a["depth"], 1).astype("float32"),
+        "area_(m2)"             : a["area"].astype("float32"),
+        "size_(cm)"             : a["size"].astype("int16"),
+        "ind_weight_(kg)"       : np.round(a["weight"], 4).astype("float32"),
+        "density_(n/ha)"        : np.round(a["density"], 2),
+        "biomass_(kg/ha)"       : np.round(a["biomass"], 3),
+        "number_individu_(n)"   : a["number"].astype("int32"),
+        "trophic"               : _categorical(a["trophic"], species_idx),
+        "family"                : _categorical(a["family"], species_idx),
+        "species"               : _categorical(a["species"], species_idx),
+        "site_name"             : _categorical(a["site_names"], site_idx),
+        "sea_site_id"           : _categorical(a["site_ids"], site_idx),
+    })
+
+
+# format derajat-menit-detik, contoh 8°25'13,2"S
+def _dms(values, positive, negative):
+    hemisphere  = np.where(values >= 0, positive, negative)
+    values      = np.abs(values)
+    degree      = values.astype(int)
+    minute      = ((values - degree) * 60).astype(int)
+    second      = (values - degree - minute / 60) * 3600
+    return (pd.Series(degree).astype(str) + "°" + pd.Series(minute).astype(str) + "'"
+            + pd.Series(_comma_decimal(second, 2)) + '"' + pd.Series(hemisphere)).to_numpy()
+
+
+# frame site mentah, satu baris per survey (site bisa disurvey berkali-kali)
+def make_site_df(n_sites=60, surveys_per_site=1, seed=0):
+    rng = np.random.default_rng(seed + 1)
+
+    site_ids, site_names, control, latitude, longitude = _site_table(n_sites, seed)
+    site_idx    = np.repeat(np.arange(n_sites), surveys_per_site)
+    n           = len(site_idx)
+
+    # campuran format koordinat seperti di registry site asli
+    style       = rng.choice(["dms", "decimal", "comma", "na"], n, p=[0.6, 0.2, 0.15, 0.05])
+    lat, lon    = latitude[site_idx], longitude[site_idx]
+    lat_text    = np.where(style == "dms", _dms(lat, "N", "S"), np.round(lat, 5).astype(str))
+    lon_text    = np.where(style == "dms", _dms(lon, "E", "W"), np.round(lon, 5).astype(str))
+    lat_text    = np.where(style == "comma", np.char.replace(lat_text.astype(str), ".", ","), lat_text)
+    lon_text    = np.where(style == "comma", np.char.replace(lon_text.astype(str), ".", ","), lon_text)
+    lat_text    = np.where(style == "na", "n/a", lat_text)
+    lon_text    = np.where(style == "na", "n/a", lon_text)
+
+    day         = pd.Timestamp("2012-01-01") + pd.to_timedelta(rng.integers(0, 13 * 365, n), unit="D")
+    hour        = rng.integers(7, 16, n)
+    minute      = rng.integers(0, 60, n)
+    time_text   = pd.Series(hour).astype(str) + "." + pd.Series(minute).astype(str).str.zfill(2)
+    time_text   = np.where(rng.random(n) < 0.1, "n/a", time_text)
+
+    df = pd.DataFrame({
+        "Rec ID"            : np.arange(1, n + 1).astype(str),
+        "Sea Site ID"       : site_ids[site_idx],
+        "Site Name"         : site_names[site_idx],
+        "MPA/Control"       : control[site_idx],
+        "MPA"               : np.array([f"KKP {i % 7 + 1}" for i in range(n_sites)])[site_idx],
+        "Latitude"          : lat_text,
+        "Longitude"         : lon_text,
+        "Dive No."          : np.where(rng.random(n) < 0.1, "n/a", rng.integers(1, 6, n).astype(str)),
+        "Slope Angle"       : np.where(rng.random(n) < 0.2, "n/a", _comma_decimal(rng.uniform(0, 60, n), 1)),
+        "Visibility"        : np.where(rng.random(n) < 0.1, "n/a", _comma_decimal(rng.uniform(2, 25, n), 1)),
+        "Bleaching"         : rng.choice(["No", "Low", "Moderate", "High"], n),
+        "Date of Survey"    : day.strftime("%Y-%m-%d %H:%M:%S"),
+        "Time"              : time_text,
+        "Remarks"           : "n/a",
+        "Surveyor"          : "n/a",
+    }, columns=SITE_COLUMNS)
+
+    return df.astype(object)
+
+
+# tulis pasangan workbook mpa_fish.xlsx / mpa_site.xlsx ke folder
+def write_workbooks(folder, n, n_sites=60, seed=0, years=(2012, 2024)):
+    os.makedirs(folder, exist_ok=True)
+    path_measure    = os.path.join(folder, "mpa_fish.xlsx")
+    path_site       = os.path.join(folder, "mpa_site.xlsx")
+    make_measure_df(n, n_sites=n_sites, years=years, seed=seed).to_excel(path_measure, index=False)
+    make_site_df(n_sites, seed=seed).to_excel(path_site, index=False)
+    return path_measure, path_site
@@ -0,0 +1,102 @@
+import math
+import re
+
+import pandas as pd
+
+
+# paging, sorting dan filter DataTable dikerjakan di server (mode custom),
+# jadi yang dikirim ke browser hanya satu halaman (page_size baris)
+
+# {kolom} operator nilai, contoh: {family} contains Poma, {species} >= 3
+_filter_part = re.compile(
+    r"^\s*\{(?P<name>[^}]*)\}\s*"
+    r"(?P<case>[is]?)(?P<op>>=|<=|!=|<|>|=|ge|le|ne|lt|gt|eq|contains|datestartswith)"
+    r"(?:\s+(?P<value>.*?))?\s*$"
+)
+
+_operators = {
+    ">=": "ge", "<=": "le", "!=": "ne", "<": "lt", ">": "gt", "=": "eq",
+}
+
+
+# pecah satu bagian filter_query jadi (kolom, operator, nilai, case_insensitive)
+def split_filter_part(part):
+    match = _filter_part.match(part)
+    if match is None:
+        return None
+
+    value = match.group("value") or ""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+        value = value[1:-1].replace("\\" + value[0], value[0])
+    else:
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+
+    op = _operators.get(match.group("op"), match.group("op"))
+    return match.group("name"), op, value, match.group("case") == "i"
+
+
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _filter_mask(series, op, value, ignore_case):
+    numeric = pd.api.types.is_numeric_dtype(series) and isinstance(value, float)
+    if numeric and op not in ("contains", "datestartswith"):
+        left = series
+    else:
+        # kolom teks (object/category) dibandingkan sebagai string
+        left    = series.astype(str)
+        value   = _text(value)
+        if ignore_case:
+            left, value = left.str.lower(), value.lower()
+
+    if op == "contains":
+        return left.str.contains(value, regex=False)
+    if op == "datestartswith":
+        return left.str.startswith(value)
+    if op == "eq":
+        return left == value
+    if op == "ne":
+        return left != value
+    if op == "lt":
+        return left < value
+    if op == "le":
+        return left <= value
+    if op == "gt":
+        return left > value
+    if op == "ge":
+        return left >= value
+    raise ValueError(f"operator filter tidak dikenal: {op}")
+
+
+# terapkan filter_query dan sort_by DataTable ke frame agregat
+def apply_query(df, filter_query="", sort_by=None):
+    if filter_query:
+        for part in filter_query.split(" && "):
+            parsed = split_filter_part(part)
+            if parsed is None:
+                continue
+            name, op, value, ignore_case = parsed
+            if name in df.columns:
+                df = df[_filter_mask(df[name], op, value, ignore_case).to_numpy()]
+
+    if sort_by:
+        columns = [s["column_id"] for s in sort_by if s["column_id"] in df.columns]
+        if columns:
+            ascending = [s["direction"] == "asc" for s in sort_by if s["column_id"] in df.columns]
+            df = df.sort_values(columns, ascending=ascending, kind="stable")
+
+    return df
+
+
+# ambil satu halaman; return (records, page_count, page_current yang valid)
+def page_records(df, page_current, page_size):
+    page_count      = max(1, math.ceil(len(df) / page_size))
+    page_current    = min(max(page_current or 0, 0), page_count - 1)
+    start           = page_current * page_size
+    return df.iloc[start:start + page_size].to_dict("records"), page_count, page_current
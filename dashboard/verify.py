@@ -0,0 +1,256 @@
+import itertools
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import curate
+import synth
+from cube import FilterCube
+from filter_index import FilterIndex, FILTER_COLUMNS
+
+
+# cek stage vectorized di curate.py menghasilkan frame yang identik dengan
+# versi per-baris (referensi), di workbook asli dan di data sintetis,
+# dan objek turunan yang diperbarui saat ingest bertahap sama dengan yang dibangun ulang.
+# jalankan: python verify.py
+
+
+def _run(df, stages):
+    for stage in stages:
+        df = stage(df)
+    return df
+
+
+def _same_error(ref, vec, df):
+    errors = []
+    for fn in (ref, vec):
+        try:
+            fn(df.copy())
+            errors.append(None)
+        except Exception as exc:
+            errors.append(type(exc))
+    assert errors[0] == errors[1], f"{ref.__name__}: {errors[0]} != {errors[1]}"
+
+
+def check_measure(measure_df):
+    header  = curate.measure_df_clean_header(measure_df.copy())
+    ref     = curate.measure_df_update_dtype(header.copy())
+    vec     = curate.measure_df_update_dtype_vec(header.copy())
+    pd.testing.assert_frame_equal(ref, vec, check_exact=True)
+
+
+def check_site(site_df):
+    header  = _run(site_df.copy(), [
+        curate.site_df_onetime_truncate_columns,
+        curate.site_df_clean_header,
+    ])
+
+    ref     = curate.site_df_handle_time(header.copy())
+    vec     = curate.site_df_handle_time_vec(header.copy())
+    pd.testing.assert_frame_equal(ref, vec, check_exact=True)
+
+    # site_df_replace_na referensi selalu TypeError (str.replace dengan np.nan),
+    # jadi dicek terhadap maksud fungsinya: hanya cell "n/a" yang jadi NaN
+    replaced = curate.site_df_replace_na_vec(header.copy())
+    for col in curate.site_na_columns:
+        is_na = header[col] == "n/a"
+        assert replaced[col][is_na].isna().all(), col
+        pd.testing.assert_series_equal(replaced[col][~is_na], header[col][~is_na])
+
+    # setelah update_dtype hasilnya sama dengan pipeline tanpa replace_na
+    stages  = [
+        curate.site_df_replace_comma,
+        curate.site_df_cleanse_coordinate,
+        curate.site_df_update_dtype,
+    ]
+    ref     = _run(header.copy(), stages)
+    vec     = _run(replaced.copy(), stages)
+    for col in curate.site_na_columns:
+        pd.testing.assert_series_equal(
+            pd.to_numeric(ref[col]).astype(float), pd.to_numeric(vec[col]).astype(float))
+
+
+def _coordinates_ref(series):
+    return series.apply(curate.latlon_to_decimal).astype(float).to_numpy()
+
+
+def check_coordinates(site_df):
+    header  = _run(site_df.copy(), [
+        curate.site_df_onetime_truncate_columns,
+        curate.site_df_clean_header,
+        curate.site_df_replace_comma,
+    ])
+
+    for col in ["latitude", "longitude"]:
+        ref = _coordinates_ref(header[col])
+        vec = curate.latlon_to_decimal_bulk(header[col])
+        assert vec.dtype == np.float64, col
+        np.testing.assert_array_equal(ref, vec)
+
+    ref     = curate.site_df_update_dtype(curate.site_df_cleanse_coordinate(header.copy()))
+    vec     = curate.site_df_update_dtype(curate.site_df_cleanse_coordinate_vec(header.copy()))
+    pd.testing.assert_frame_equal(ref, vec, check_exact=True)
+
+
+# kasus pinggir yang jarang ada di data sintetis
+def check_edge_cases():
+    measure_df = synth.make_measure_df(50, seed=7)
+    measure_df.loc[0, "Depth (m)"]          = " 3,5"
+    measure_df.loc[1, "Biomass (kg/ha)"]    = "nan"
+    measure_df.loc[2, "Density (n/ha)"]     = "1e3"
+    measure_df.loc[3, "Size (cm)"]          = "12,0"
+    check_measure(measure_df)
+
+    broken = curate.measure_df_clean_header(measure_df.copy())
+    broken.loc[4, "depth_(m)"] = "n/a"
+    _same_error(curate.measure_df_update_dtype, curate.measure_df_update_dtype_vec, broken)
+
+    site_df = synth.make_site_df(12, seed=7)
+    site_df["Time"] = ["8.5", "08.05", "10:30", "n/a", "12.0", "7.5.1",
+                       "13.45", " 9.7", "", "14.59", "6", "11.00"]
+    check_site(site_df)
+
+    broken = curate.site_df_clean_header(curate.site_df_onetime_truncate_columns(site_df.copy()))
+    broken.loc[0, "time"] = "a.b"
+    _same_error(curate.site_df_handle_time, curate.site_df_handle_time_vec, broken)
+
+    coords = pd.Series(["n/a", "nan", "NaN", "", "-6.5", "115.25", "8°25'13.2\"S",
+                        "8 25 13,2 s", "115°30'0\"E", "12°3'4\"W", "1°2'3\"N", "1 2",
+                        "8°25'13.2\"S", "-6.5", "1 2 3 4 s"], dtype=object)
+    for _ in range(2):
+        # putaran kedua lewat memo
+        np.testing.assert_array_equal(_coordinates_ref(coords), curate.latlon_to_decimal_bulk(coords))
+
+    for bad in ["6.5s", "6,5"]:
+        _same_error(_coordinates_ref, curate.latlon_to_decimal_bulk, pd.Series([bad], dtype=object))
+
+
+# tabel hasil cube dibandingkan tanpa melihat urutan baris/kategori (kategori baru dari
+# ingest bertahap ditambahkan di belakang, hasil bangun ulang terurut)
+def _same_table(a, b, label):
+    assert sorted(a.columns) == sorted(b.columns) and len(a) == len(b), label
+    floats  = [col for col in a.columns if a[col].dtype.kind == "f"]
+    keys    = [col for col in a.columns if col not in floats]
+    orders  = []
+    for df in (a, b):
+        rows = list(zip(*[df[col].astype(str).to_numpy() for col in keys]))
+        orders.append(sorted(range(len(df)), key=rows.__getitem__) if rows else list(range(len(df))))
+
+    for col in keys:
+        assert (a[col].astype(str).to_numpy()[orders[0]] == b[col].astype(str).to_numpy()[orders[1]]).all(), (label, col)
+    for col in floats:
+        x = a[col].to_numpy(dtype=float, na_value=np.nan)[orders[0]]
+        y = b[col].to_numpy(dtype=float, na_value=np.nan)[orders[1]]
+        assert np.allclose(x, y, equal_nan=True), (label, col)
+
+
+def _same_value(a, b, label):
+    if isinstance(a, pd.DataFrame):
+        _same_table(a, b, label)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys(), label
+        for key in a:
+            _same_value(a[key], b[key], (label, key))
+    elif isinstance(a, (float, np.floating, np.ndarray, list, tuple)):
+        np.testing.assert_allclose(np.asarray(a, float), np.asarray(b, float), rtol=1e-9, err_msg=str(label))
+    else:
+        assert a == b, (label, a, b)
+
+
+# FilterIndex / FilterCube hasil update dari baris baru saja == dibangun ulang dari seluruh data,
+# untuk semua kombinasi filter (positions, lookup, box_stats)
+def check_derived(data, extended):
+    observe_fish    = data.observe_fish
+    index           = FilterIndex(observe_fish)
+    rebuilt         = {name: FilterCube(observe_fish, approximate) for name, approximate in
+                       [("cube", False), ("cube_approx", True)]}
+    values          = [["all"] + list(index.lookup[col]) for col in FILTER_COLUMNS]
+    for filters in itertools.product(*values):
+        flt         = dict(zip(FILTER_COLUMNS, filters))
+        positions   = data.get("filter_index").positions(flt)
+        expected    = index.positions(flt)
+        assert (positions is None and expected is None) or np.array_equal(positions, expected), filters
+        for name, cube in rebuilt.items():
+            _same_value(data.get(name).lookup(*filters), cube.lookup(*filters), (name, filters))
+            _same_value(data.get(name).box_stats(*filters), cube.box_stats(*filters), (name, filters))
+    assert extended == ["filter_index", "cube", "cube_approx"], extended
+
+
+# ingest append-only pada workbook sintetis: batch dengan family + tahun baru, batch site saja,
+# dan baris yang ditambahkan ke workbook yang sudah ada
+def check_incremental():
+    with tempfile.TemporaryDirectory() as root:
+        path_measure, path_site = synth.write_workbooks(root, 2_000, n_sites=20, seed=11, years=(2023, 2024))
+        for folder in ("fish", "site"):
+            os.makedirs(os.path.join(root, "batches", folder))
+
+        data        = curate.CurateData(path_measure, path_site,
+                                        batch_measure=os.path.join(root, "batches", "fish"),
+                                        batch_site=os.path.join(root, "batches", "site"),
+                                        workers=1, cache_dir=os.path.join(root, ".cache"))
+        extended    = []
+
+        def register(name, build, extend):
+            def update(old, delta_observe, delta_site, observe_fish, site_fish):
+                extended.append(name)
+                return extend(old, delta_observe, observe_fish)
+            data.register(name, lambda observe_fish, site_fish: build(observe_fish), update)
+
+        register("filter_index", FilterIndex, lambda old, delta, observe_fish: old.extended(observe_fish))
+        register("cube", FilterCube, lambda old, delta, observe_fish: old.extended(delta))
+        register("cube_approx", lambda observe_fish: FilterCube(observe_fish, True),
+                 lambda old, delta, observe_fish: old.extended(delta))
+        for name in ("filter_index", "cube", "cube_approx"):
+            data.get(name)
+
+        # batch bulanan dengan family dan tahun yang belum ada
+        def new_batch():
+            batch = synth.make_measure_df(500, n_sites=20, years=(2025, 2025), seed=12)
+            batch.loc[:49, "Family"] = "Newidae"
+            batch.to_excel(os.path.join(root, "batches", "fish", "2025-01.xlsx"), index=False)
+
+        # site saja, observe_fish tidak bertambah
+        def site_batch():
+            synth.make_site_df(5, seed=13).to_excel(os.path.join(root, "batches", "site", "2025-01.xlsx"), index=False)
+
+        # baris baru di akhir workbook utama
+        def append_rows():
+            rows = pd.read_excel(path_measure, dtype=str)
+            pd.concat([rows, synth.make_measure_df(300, n_sites=20, years=(2023, 2024), seed=14)], ignore_index=True) \
+                .to_excel(path_measure, index=False)
+
+        for step in (new_batch, site_batch, append_rows):
+            step()
+            assert data.ingest(), step.__name__
+            assert None not in data.last_ingest.values(), (step.__name__, data.last_ingest)
+            extended.clear()
+            check_derived(data, extended)
+
+
+def main():
+    if os.path.exists(curate.path_measure) and os.path.exists(curate.path_site):
+        check_measure(pd.read_excel(curate.path_measure, dtype=str).fillna("n/a"))
+        check_site(pd.read_excel(curate.path_site, dtype=str).fillna("n/a"))
+        check_coordinates(pd.read_excel(curate.path_site, dtype=str).fillna("n/a"))
+        print("workbook asli: ok")
+    else:
+        print("workbook asli tidak ditemukan, dilewati")
+
+    for seed, n in enumerate([1_000, 50_000, 200_000]):
+        check_measure(synth.make_measure_df(n, seed=seed))
+        check_site(synth.make_site_df(200, surveys_per_site=3, seed=seed))
+        check_coordinates(synth.make_site_df(200, surveys_per_site=3, seed=seed))
+        print(f"sintetis n={n:,}: ok")
+
+    check_edge_cases()
+    print("kasus pinggir: ok")
+
+    check_incremental()
+    print("ingest bertahap: ok")
+
+
+if __name__ == "__main__":
+    sys.exit(main())